@@ -68,6 +68,7 @@ def _default_file_filter(path: Path) -> bool:
 def parse_project(
     project_path: str,
     file_filter: Callable[[Path], bool] | None = None,
+    use_cache: bool = False,
 ) -> AST:
     """Parse all PHP files in a project directory into an AST.
 
@@ -78,6 +79,8 @@ def parse_project(
         project_path: Project root directory path.
         file_filter: Function to filter files. Takes a Path and returns
             True if the file should be parsed. Defaults to .php suffix.
+        use_cache: If True, reuse cached PHP-Parser output for files whose
+            mtime and size are unchanged since the previous cached run.
 
     Returns:
         AST instance with project -> files -> statements hierarchy.
@@ -90,7 +93,9 @@ def parse_project(
     if file_filter is None:
         file_filter = _default_file_filter
     parser = Parser()
-    return parser.parse_project(project_path, file_filter=file_filter)
+    return parser.parse_project(
+        project_path, file_filter=file_filter, use_cache=use_cache
+    )
 
 
 __version__ = "0.1.0"
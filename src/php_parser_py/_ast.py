@@ -2,14 +2,16 @@
 
 from __future__ import annotations
 
-import json
+import hashlib
 import logging
-from typing import Any
+from collections import deque
+from typing import Any, Callable, Iterator, Mapping
 
 from cpg2py import AbcGraphQuerier, Storage
 
 from php_parser_py._edge import Edge
 from php_parser_py._exceptions import NodeNotInFileError
+from php_parser_py._json import dumps as json_dumps
 from php_parser_py._node import Node
 
 logger = logging.getLogger(__name__)
@@ -37,8 +39,43 @@ class AST(AbcGraphQuerier[Node, Edge]):
 
     Attributes:
         _root_node_id: ID of the root project node (always "project").
+        _file_by_path: Lazily built relativePath -> File node index, or None.
+            Dropped by _invalidate_caches() whenever the graph is mutated.
+        _all_nodes: Lazily built list of Node wrappers for every node, reused
+            by nodes() queries; dropped by _invalidate_caches().
+        _ids_by_type: Lazily built nodeType -> node IDs column, in storage
+            order, read straight from Storage; dropped by
+            _invalidate_caches().
+        _nodes_by_type: Node lists per nodeType behind nodes_of_type(),
+            wrapped from _ids_by_type on first query of each type; dropped
+            by _invalidate_caches().
+        _wrappers: Node wrappers handed out by nodes(), nodes_of_type() and
+            first_node(), by ID, so each node has one wrapper until the AST
+            is modified.
+        _file_of_node: Lazily built node ID -> containing File node ID map,
+            used by get_file_node() for IDs outside the file-hash naming
+            convention; dropped by _invalidate_caches().
+        _raw_json: Original PHP-Parser statement JSON per file hash, as the
+            bytes PHP produced or the decoded list, kept when parsing with
+            ``retain_json=True``; cleared on any mutation.
+        _version: Mutation counter bumped by _invalidate_caches(); see
+            version.
     """
 
+    # Slots for this class's own fields; AbcGraphQuerier has no __slots__, so
+    # instances keep a __dict__ (and weak-reference support) for its state.
+    __slots__ = (
+        "_root_node_id",
+        "_file_by_path",
+        "_all_nodes",
+        "_ids_by_type",
+        "_nodes_by_type",
+        "_wrappers",
+        "_file_of_node",
+        "_raw_json",
+        "_version",
+    )
+
     def __init__(self, storage: Storage, root_node_id: str = "project") -> None:
         """Initialize AST with populated storage.
 
@@ -48,6 +85,88 @@ class AST(AbcGraphQuerier[Node, Edge]):
         """
         super().__init__(storage)
         self._root_node_id = root_node_id
+        self._file_by_path: dict[str, Node] | None = None
+        self._all_nodes: list[Node] | None = None
+        self._ids_by_type: dict[str, list[str]] | None = None
+        self._nodes_by_type: dict[str, list[Node]] = {}
+        self._wrappers: dict[str, Node] = {}
+        self._file_of_node: dict[str, str] | None = None
+        self._raw_json: dict[str, bytes | list[Any]] = {}
+        self._version = 0
+
+    def _invalidate_caches(self) -> None:
+        """Drop derived data; called after every mutation.
+
+        Modifier calls this for structural changes and Node/Edge wrappers
+        obtained from this AST call it from set_property/set_properties.
+        Writes made directly to Storage or to a ``properties`` dict are not
+        tracked.
+        """
+        self._file_by_path = None
+        self._all_nodes = None
+        self._ids_by_type = None
+        self._nodes_by_type = {}
+        self._wrappers = {}
+        self._file_of_node = None
+        self._raw_json.clear()
+        self._version += 1
+
+    def mark_modified(self) -> None:
+        """Record a change made outside Modifier and the Node/Edge setters.
+
+        Call after writing to Storage directly or to a node's/edge's
+        ``properties``/``all_properties`` dict, so derived data is rebuilt:
+        this bumps version and drops the indexes and retained JSON, exactly
+        as a tracked mutation does.
+        """
+        self._invalidate_caches()
+
+    def _retain_json(self, file_hash: str, stmts: bytes | list[Any]) -> None:
+        """Keep a file's PHP-Parser statement JSON for raw_json()."""
+        self._raw_json[file_hash] = stmts
+
+    @property
+    def version(self) -> int:
+        """Return a counter that changes on every tracked mutation.
+
+        Lets callers cache results derived from the AST (such as
+        PrettyPrinter output) and tell when they are stale. Tracks the same
+        mutations as is_dirty(); direct Storage writes are not counted unless
+        followed by mark_modified().
+        """
+        return self._version
+
+    def is_dirty(self, file_hash: str) -> bool:
+        """Return whether a file's original PHP-Parser JSON is unavailable.
+
+        A file is clean only if its parse-time JSON was retained (see
+        ``Parser(retain_json=True)``) and the AST has not been modified since.
+
+        Args:
+            file_hash: File node ID.
+
+        Returns:
+            True if raw_json(file_hash) would return None.
+        """
+        return file_hash not in self._raw_json
+
+    def raw_json(self, file_hash: str) -> bytes | None:
+        """Return a file's original PHP-Parser JSON if it is still valid.
+
+        Skips the graph walk of to_json(); for an unmodified AST the payload
+        prints the same code as to_json_bytes(file_hash).
+
+        Args:
+            file_hash: File node ID.
+
+        Returns:
+            Compact JSON bytes, or None if not retained or the AST was
+            modified after parsing.
+        """
+        stmts = self._raw_json.get(file_hash)
+        if stmts is None or isinstance(stmts, bytes):
+            return stmts
+        return json_dumps(stmts)
 
     def node(self, whose_id_is: str) -> Node:
         """Return node wrapper by ID.
@@ -63,15 +182,172 @@ class AST(AbcGraphQuerier[Node, Edge]):
         """
         if not self.storage.contains_node(whose_id_is):
             raise KeyError(f"Node not found: {whose_id_is!r}")
-        return Node(self.storage, whose_id_is)
+        return Node(self.storage, whose_id_is, self)
+
+    def nodes(
+        self,
+        who_satisifies: Callable[[Node], bool] | None = None,
+        *,
+        node_type: str | None = None,
+        where: Mapping[str, Any] | None = None,
+    ) -> Iterator[Node]:
+        """Return all nodes matching the condition.
+
+        The Node wrappers are built once and kept until the AST is modified,
+        so repeated queries filter a flat list instead of re-creating a
+        wrapper (and its existence check) for every node on every call.
+        With node_type, candidates come from the nodes_of_type() index and
+        only nodes of that type are passed to the condition. where filters
+        on property values (see Node.matches) before the condition runs; a
+        string "nodeType" entry in it is served by the index like node_type.
+
+        Args:
+            who_satisifies: Optional node condition; all nodes if omitted.
+            node_type: Optional nodeType to restrict the query to.
+            where: Optional property names mapped to required values, e.g.
+                ``{"nodeType": "Expr_Closure", "static": True}``.
+
+        Returns:
+            Iterator over matching nodes, in storage order.
+        """
+        conditions = dict(where) if where else {}
+        if node_type is None and isinstance(conditions.get("nodeType"), str):
+            node_type = conditions.pop("nodeType")
+
+        candidates: Iterator[Node]
+        if node_type is not None:
+            candidates = self.nodes_of_type(node_type)
+        else:
+            all_nodes = self._all_nodes
+            if all_nodes is None:
+                # Reuse wrappers nodes_of_type() already made, then register
+                # the full list in one pass
+                storage = self.storage
+                ids = list(storage.get_nodes())
+                if self._wrappers:
+                    get = self._wrappers.get
+                    all_nodes = [get(nid) or Node(storage, nid, self) for nid in ids]
+                else:
+                    all_nodes = [Node(storage, nid, self) for nid in ids]
+                self._all_nodes = all_nodes
+                self._wrappers = dict(zip(ids, all_nodes))
+            candidates = iter(all_nodes)
+
+        if conditions:
+            candidates = (node for node in candidates if node.matches(conditions))
+        if who_satisifies is None:
+            return candidates
+        return (node for node in candidates if who_satisifies(node))
+
+    def node_ids(
+        self,
+        *,
+        node_type: str | None = None,
+        where: Mapping[str, Any] | None = None,
+    ) -> Iterator[str]:
+        """Return the IDs of matching nodes without building Node wrappers.
+
+        Types come from the nodeType column shared with nodes_of_type() and
+        the where properties are read straight from Storage, so a caller
+        that only needs IDs (counting, set comparisons, handing IDs to
+        Modifier) never allocates a Node and does not populate the node
+        list cache behind nodes(). The IDs are snapshotted when called, so
+        the AST may be modified while iterating.
+
+        Args:
+            node_type: Optional nodeType to restrict the query to.
+            where: Optional property names mapped to required values, as for
+                nodes().
+
+        Returns:
+            Iterator over matching node IDs, in storage order.
+        """
+        conditions = dict(where) if where else {}
+        if node_type is None and isinstance(conditions.get("nodeType"), str):
+            node_type = conditions.pop("nodeType")
+        elif node_type is not None and "nodeType" in conditions:
+            if conditions.pop("nodeType") != node_type:
+                return iter(())
+
+        if node_type is not None:
+            ids = list(self._type_column().get(node_type, ()))
+        else:
+            ids = list(self.storage.get_nodes())
+        if not conditions:
+            return iter(ids)
+        return self._ids_matching(ids, conditions)
+
+    def _ids_matching(
+        self, ids: list[str], conditions: dict[str, Any]
+    ) -> Iterator[str]:
+        # Same test as Node.matches, applied to Storage's props dicts
+        get_props = self.storage.get_node_props
+        for nid in ids:
+            props = get_props(nid)
+            if props is None:
+                continue
+            for key, value in conditions.items():
+                if key not in props or props[key] != value:
+                    break
+            else:
+                yield nid
+
+    def __len__(self) -> int:
+        """Return the number of nodes in the graph; same as node_count."""
+        return self.node_count
+
+    def structural_signature(self) -> str:
+        """Return a digest of the node types the AST contains.
+
+        Two ASTs share a signature when they hold the same nodeTypes the same
+        number of times, regardless of node IDs, positions or file paths.
+        This makes it a cheap round-trip check (parse, print, re-parse).
+        Counts come from the nodeType column, so no Node wrappers are built.
+
+        Returns:
+            Hex digest of the sorted (nodeType, count) pairs.
+        """
+        column = self._type_column()
+        digest = hashlib.blake2b(digest_size=16)
+        for node_type in sorted(column):
+            digest.update(f"{node_type}:{len(column[node_type])}\n".encode())
+        return digest.hexdigest()
+
+    @property
+    def node_count(self) -> int:
+        """Return the number of nodes in the graph.
+
+        Reads the size of Storage's node table instead of wrapping and
+        counting nodes, so it is O(1) and always reflects modifications.
+
+        Returns:
+            Number of nodes, including the project and file nodes.
+        """
+        return len(self.storage.get_nodes())
 
-    def edge(self, fid: str, tid: str, eid: str) -> Edge:
+    def count(self, node_type: str | None = None) -> int:
+        """Return the number of nodes, optionally of a single nodeType.
+
+        Per-type counts come from the nodeType column shared with
+        nodes_of_type(), so no Node wrappers are built.
+
+        Args:
+            node_type: PHP-Parser node type to count, or None for all nodes.
+
+        Returns:
+            Number of matching nodes; 0 for a type the AST does not contain.
+        """
+        if node_type is None:
+            return self.node_count
+        return len(self._type_column().get(node_type, ()))
+
+    def edge(self, fid: str, tid: str, eid: str = "PARENT_OF") -> Edge:
         """Return edge wrapper by IDs.
 
         Args:
             fid: From node ID.
             tid: To node ID.
-            eid: Edge type.
+            eid: Edge type. Defaults to "PARENT_OF".
 
         Returns:
             Edge instance for the given (from, to, type).
@@ -82,7 +358,208 @@ class AST(AbcGraphQuerier[Node, Edge]):
         edge_id = (fid, tid, eid)
         if not self.storage.contains_edge(edge_id):
             raise KeyError(f"Edge not found: {edge_id!r}")
-        return Edge(self.storage, fid, tid, eid)
+        return Edge(self.storage, fid, tid, eid, owner=self)
+
+    def nodes_of_type(self, node_type: str) -> Iterator[Node]:
+        """Return all nodes of the given nodeType via an index.
+
+        Equivalent to ``nodes(lambda n: n.node_type == node_type)``, but the
+        nodeType column is built once and reused until the AST is modified,
+        so each query is a dict lookup instead of a scan. Only the requested
+        type's nodes are wrapped, so a first query does not pay for a
+        wrapper per node in the AST.
+
+        Args:
+            node_type: PHP-Parser node type, e.g. "Stmt_Function", or
+                "Project"/"File".
+
+        Returns:
+            Iterator over matching nodes, in storage order.
+        """
+        typed = self._nodes_by_type.get(node_type)
+        if typed is None:
+            ids = self._type_column().get(node_type, ())
+            wrap = self._wrap
+            typed = self._nodes_by_type[node_type] = [wrap(nid) for nid in ids]
+        return iter(typed)
+
+    def _type_column(self) -> dict[str, list[str]]:
+        """Return node IDs grouped by nodeType, building it on first use."""
+        column = self._ids_by_type
+        if column is None:
+            # Read nodeType straight from each props dict; going through
+            # Node.node_type costs several calls per node on large projects
+            get_props = self.storage.get_node_props
+            column = self._ids_by_type = {}
+            for nid in self.storage.get_nodes():
+                props = get_props(nid) or {}
+                column.setdefault(props.get("nodeType", ""), []).append(nid)
+        return column
+
+    def _wrap(self, nid: str) -> Node:
+        """Return the shared wrapper for an existing node ID."""
+        node = self._wrappers.get(nid)
+        if node is None:
+            node = self._wrappers[nid] = Node(self.storage, nid, self)
+        return node
+
+    def first_node_of_type(self, node_type: str) -> Node | None:
+        """Return the first node of the given nodeType via the type index.
+
+        Equivalent to ``first_node(lambda n: n.node_type == node_type)``.
+
+        Args:
+            node_type: PHP-Parser node type, e.g. "Stmt_Function".
+
+        Returns:
+            First matching node in storage order, or None if none matches.
+        """
+        return next(self.nodes_of_type(node_type), None)
+
+    def first_node(
+        self,
+        who_satisifies: Callable[[Node], bool] | None = None,
+        *,
+        node_type: str | None = None,
+        where: Mapping[str, Any] | None = None,
+    ) -> Node | None:
+        """Return the first node matching the condition.
+
+        Scans the cached node list when nodes() has built it; otherwise
+        wraps nodes one at a time and stops at the first match, so an early
+        hit does not pay for materializing every node. node_type and where
+        narrow the search as in nodes().
+
+        Args:
+            who_satisifies: Optional node condition; any node if omitted.
+            node_type: Optional nodeType to restrict the query to.
+            where: Optional property names mapped to required values.
+
+        Returns:
+            First matching node in storage order, or None if none matches.
+        """
+        if node_type is not None or where:
+            matching = self.nodes(who_satisifies, node_type=node_type, where=where)
+            return next(matching, None)
+
+        if self._all_nodes is not None:
+            for node in self._all_nodes:
+                if who_satisifies is None or who_satisifies(node):
+                    return node
+            return None
+
+        wrap = self._wrap
+        for nid in self.storage.get_nodes():
+            node = wrap(nid)
+            if who_satisifies is None or who_satisifies(node):
+                return node
+        return None
+
+    def succ(
+        self, of: Node, who_satisifies: Callable[[Edge], bool] | None = None
+    ) -> Iterator[Node]:
+        """Return direct successors of a node, one per outgoing edge.
+
+        Args:
+            of: Source node.
+            who_satisifies: Optional edge condition; all edges if omitted.
+
+        Returns:
+            Iterator over successor nodes.
+        """
+        return self._neighbours(of, who_satisifies, reverse=False)
+
+    def prev(
+        self, of: Node, who_satisifies: Callable[[Edge], bool] | None = None
+    ) -> Iterator[Node]:
+        """Return direct predecessors of a node, one per incoming edge.
+
+        Args:
+            of: Target node.
+            who_satisifies: Optional edge condition; all edges if omitted.
+
+        Returns:
+            Iterator over predecessor nodes.
+        """
+        return self._neighbours(of, who_satisifies, reverse=True)
+
+    def _neighbours(
+        self, of: Node, condition: Callable[[Edge], bool] | None, reverse: bool
+    ) -> Iterator[Node]:
+        """Yield the node at the other end of each edge of a node.
+
+        Same order as cpg2py's succ/prev, but reads edge IDs straight from
+        Storage and only builds an Edge wrapper when there is a condition to
+        call. Adjacency entries left behind for deleted nodes are skipped.
+        """
+        storage = self.storage
+        edges = storage.in_edges(of.id) if reverse else storage.out_edges(of.id)
+        for src, dst, edge_type in edges:
+            other_id = src if reverse else dst
+            if not storage.contains_node(other_id):
+                continue
+            if condition is not None and not condition(
+                Edge(storage, src, dst, edge_type, owner=self)
+            ):
+                continue
+            yield Node(storage, other_id, self)
+
+    def descendants(
+        self, src: Node, condition: Callable[[Edge], bool] | None = None
+    ) -> Iterator[Node]:
+        """Return descendants of a node in BFS order (src not included).
+
+        Args:
+            src: Source node.
+            condition: Optional edge condition; all edges if omitted.
+
+        Returns:
+            Iterator over descendant nodes.
+        """
+        return self._bfs(src, condition, reverse=False)
+
+    def ancestors(
+        self, src: Node, condition: Callable[[Edge], bool] | None = None
+    ) -> Iterator[Node]:
+        """Return ancestors of a node in BFS order (src not included).
+
+        Args:
+            src: Source node.
+            condition: Optional edge condition; all edges if omitted.
+
+        Returns:
+            Iterator over ancestor nodes.
+        """
+        return self._bfs(src, condition, reverse=True)
+
+    def _bfs(
+        self, root: Node, condition: Callable[[Edge], bool] | None, reverse: bool
+    ) -> Iterator[Node]:
+        """Breadth-first walk from root, yielding each node once.
+
+        Same order as cpg2py's traversal, but iterative over a deque with a
+        set of seen IDs (cpg2py keeps them in a list, so each membership test
+        is O(n)). Without a condition, neighbours come straight from Storage
+        instead of building an Edge wrapper per edge. Adjacency entries left
+        behind by Storage.remove_node for deleted nodes are skipped.
+        """
+        storage = self.storage
+        seen = {root.id}
+        queue = deque([root.id])
+        while queue:
+            nid = queue.popleft()
+            edges = storage.in_edges(nid) if reverse else storage.out_edges(nid)
+            for src, dst, edge_type in edges:
+                next_id = src if reverse else dst
+                if next_id in seen or not storage.contains_node(next_id):
+                    continue
+                if condition is not None and not condition(
+                    Edge(storage, src, dst, edge_type, owner=self)
+                ):
+                    continue
+                seen.add(next_id)
+                queue.append(next_id)
+                yield Node(storage, next_id, self)
 
     def project_node(self) -> Node:
         """Return the project node (root of the AST).
@@ -98,7 +575,7 @@ class AST(AbcGraphQuerier[Node, Edge]):
         """
         if not self.storage.contains_node(self._root_node_id):
             raise KeyError(f"Project node not found: {self._root_node_id!r}")
-        return Node(self.storage, self._root_node_id)
+        return Node(self.storage, self._root_node_id, self)
 
     def file_nodes(self) -> list[Node]:
         """Return all file nodes in the project.
@@ -106,20 +583,74 @@ class AST(AbcGraphQuerier[Node, Edge]):
         Returns:
             List of File Node instances.
         """
-        try:
-            project = self.project_node()
-        except KeyError:
+        if not self.storage.contains_node(self._root_node_id):
             return []
 
+        project = Node(self.storage, self._root_node_id, self)
         file_nodes = [n for n in self.succ(project) if n.node_type == "File"]
         return sorted(file_nodes, key=lambda n: n.get("absolutePath", ""))
 
+    def file_paths(self, absolute: bool = False) -> list[str]:
+        """Return the path of every file node, in file_nodes() order.
+
+        Reads the paths straight from the file nodes' properties, so no Node
+        wrappers are built. Files without the requested path are skipped.
+
+        Args:
+            absolute: Return ``absolutePath`` instead of ``relativePath``.
+
+        Returns:
+            List of file path strings.
+        """
+        storage = self.storage
+        if not storage.contains_node(self._root_node_id):
+            return []
+
+        file_props: list[dict[str, Any]] = []
+        for nid in storage.successors(self._root_node_id):
+            props = storage.get_node_props(nid)
+            if props and props.get("nodeType") == "File":
+                file_props.append(props)
+        file_props.sort(key=lambda props: props.get("absolutePath", ""))
+
+        key = "absolutePath" if absolute else "relativePath"
+        return [p[key] for p in file_props if isinstance(p.get(key), str)]
+
+    def file_node_by_path(self, relative_path: str) -> Node:
+        """Return the file node whose ``relativePath`` matches.
+
+        The relativePath -> File node index is built on first use and reused
+        until the graph is mutated through Modifier.
+
+        Args:
+            relative_path: Relative file path as stored on the file node.
+
+        Returns:
+            File Node instance.
+
+        Raises:
+            KeyError: If no file node has the given relative path.
+        """
+        if self._file_by_path is None:
+            index: dict[str, Node] = {}
+            for file_node in self.file_nodes():
+                index.setdefault(file_node.get_property("relativePath"), file_node)
+            self._file_by_path = index
+
+        found = self._file_by_path.get(relative_path)
+        if found is None:
+            raise KeyError(
+                f"File with relative path '{relative_path}' not found in AST."
+            )
+        return found
+
     def get_file_node(self, node_id: str) -> Node:
         """Get the file node that contains the given node.
 
         Uses the AST ID convention: file node ID is the file hash (e.g. 8-char hex);
         nodes inside that file have ID ``file_hash + "_" + increment`` (e.g. ``a1b2c3d4_1``).
-        Resolves by structure first, then falls back to ancestors() traversal.
+        Resolves by structure first, then falls back to a node -> file map
+        built once by walking down from every File node.
 
         Args:
             node_id: ID of any node in the AST.
@@ -142,53 +673,102 @@ class AST(AbcGraphQuerier[Node, Edge]):
         if result is not None:
             return result
 
-        return self._find_file_ancestor(node)
+        file_id = self._file_ids_by_node().get(node_id)
+        if file_id is None:
+            raise NodeNotInFileError(node_id, "No File node among ancestors.")
+        return Node(self.storage, file_id, self)
+
+    def _file_ids_by_node(self) -> dict[str, str]:
+        """Return the node ID -> containing File node ID map, building it once.
+
+        One walk down from each File node replaces a per-query ancestor
+        search. Every File node counts, attached to the project or not; a
+        node reachable from several files maps to the first in storage order.
+        """
+        file_of_node = self._file_of_node
+        if file_of_node is None:
+            storage = self.storage
+            file_of_node = self._file_of_node = {}
+            for file_node in self.nodes_of_type("File"):
+                file_id = file_node.id
+                stack = list(storage.successors(file_id))
+                while stack:
+                    nid = stack.pop()
+                    if nid in file_of_node or not storage.contains_node(nid):
+                        continue
+                    file_of_node[nid] = file_id
+                    stack.extend(storage.successors(nid))
+        return file_of_node
 
     def _try_file_by_id_prefix(self, node_id: str) -> Node | None:
         """Try to find file node by ID prefix convention.
 
         If node_id is like "hash_123", attempts to get file node with ID "hash".
+        The prefix is everything before the last underscore, as in
+        Node.relative_path, so file IDs may themselves contain underscores.
         Returns None if ID doesn't match convention or file not found.
         """
-        if "_" not in node_id:
+        prefix, sep, index = node_id.rpartition("_")
+        if not sep or not index.isdigit():
             return None
 
-        prefix, rest = node_id.split("_", 1)
-        if not rest.isdigit():
+        props = self.storage.get_node_props(prefix)
+        if props is None or props.get("nodeType") != "File":
             return None
+        return Node(self.storage, prefix, self)
 
-        try:
-            candidate = self.node(prefix)
-            if candidate.node_type == "File":
-                return candidate
-        except KeyError:
-            pass
+    def to_json(self, file_hash: str | None = None) -> str:
+        """Reconstruct PHP-Parser JSON from Storage for code generation.
 
-        return None
+        If file_hash is provided, exports only that file's statements.
+        Otherwise, exports all statements from all files, or root nodes if no file structure exists.
 
-    def _find_file_ancestor(self, node: Node) -> Node:
-        """Find first File ancestor of a node via traversal.
+        Args:
+            file_hash: Optional file hash to export only that file.
 
-        Raises NodeNotInFileError if no File ancestor exists.
+        Returns:
+            Compact JSON string compatible with PHP-Parser's JsonDecoder.
+
+        Raises:
+            ValueError: If the PARENT_OF edges below a statement do not form
+                a tree (e.g. a cycle).
         """
-        for ancestor in self.ancestors(node):
-            if ancestor.node_type == "File":
-                result: Node = ancestor
-                return result
+        return json_dumps(self.to_python(file_hash)).decode("utf-8")
 
-        raise NodeNotInFileError(node.id, "No File node among ancestors.")
+    def to_json_bytes(self, file_hash: str | None = None) -> bytes:
+        """Reconstruct PHP-Parser JSON as compact UTF-8 bytes.
 
-    def to_json(self, file_hash: str | None = None) -> str:
-        """Reconstruct PHP-Parser JSON from Storage for code generation.
+        Same content as to_json(), but already encoded, so it can be written
+        to the PHP worker without another copy.
 
-        If file_hash is provided, exports only that file's statements.
-        Otherwise, exports all statements from all files, or root nodes if no file structure exists.
+        Args:
+            file_hash: Optional file hash to export only that file.
+
+        Returns:
+            Compact JSON bytes compatible with PHP-Parser's JsonDecoder.
+
+        Raises:
+            ValueError: If the PARENT_OF edges below a statement do not form
+                a tree (e.g. a cycle).
+        """
+        return json_dumps(self.to_python(file_hash))
+
+    def to_python(self, file_hash: str | None = None) -> list[dict[str, Any]]:
+        """Reconstruct the PHP-Parser statement list as Python objects.
+
+        Returns the same data to_json() serializes, for callers that want the
+        dict/list tree without an encode and decode round trip. Selection of
+        statements follows to_json().
 
         Args:
             file_hash: Optional file hash to export only that file.
 
         Returns:
-            JSON string compatible with PHP-Parser's JsonDecoder.
+            List of PHP-Parser node dicts, freshly built on each call.
+
+        Raises:
+            ValueError: If the PARENT_OF edges below a statement do not form
+                a tree (e.g. a cycle).
         """
         if file_hash:
             # Export single file (node() raises KeyError if file_hash not in graph)
@@ -203,55 +783,103 @@ class AST(AbcGraphQuerier[Node, Edge]):
                 for file_node in file_nodes:
                     top_level_nodes.extend(self._get_file_statements(file_node.id))
             else:
-                # No file structure - find root nodes via graph API (no incoming PARENT_OF)
-                all_nodes = {n.id for n in self.nodes()}
+                # No file structure - find root nodes (no incoming PARENT_OF),
+                # scanning Storage's edge-ID tuples without Edge wrappers
+                storage = self.storage
+                all_nodes = set(storage.get_nodes())
                 nodes_with_parents = {
-                    e.to_nid for e in self.edges() if e.type == "PARENT_OF"
+                    dst
+                    for _, dst, edge_type in storage.get_edges()
+                    if edge_type == "PARENT_OF"
                 }
                 root_nodes = all_nodes - nodes_with_parents
                 root_nodes.discard(self._root_node_id)
                 top_level_nodes = sorted(root_nodes)
 
-        result = [self._reconstruct_node(nid) for nid in top_level_nodes]
-        return json.dumps(result)
+        return [self._reconstruct_node(nid) for nid in top_level_nodes]
 
     def _get_file_statements(self, file_hash: str) -> list[str]:
         """Get top-level statement node IDs for a file (direct children with edge field \"stmts\").
 
-        Uses succ() traversal; statement IDs follow the convention file_hash_1, file_hash_2, ...
+        Reads the file's outgoing PARENT_OF edges straight from Storage rather
+        than wrapping each child and edge; statement IDs follow the convention
+        file_hash_1, file_hash_2, ...
         """
-        file_node = self.node(file_hash)
+        self.node(file_hash)
+        storage = self.storage
         stmts_with_index = []
-        for child in self.succ(file_node):
-            edge = self.edge(file_hash, child.id, "PARENT_OF")
-            if edge.get("field") == "stmts":
-                idx = edge.get("index")
-                stmts_with_index.append((999999 if idx is None else idx, child.id))
+        for edge_id in storage.out_edges(file_hash):
+            child_id = edge_id[1]
+            if edge_id[2] != "PARENT_OF" or not storage.contains_node(child_id):
+                continue
+            edge_props = storage.get_edge_props(edge_id) or {}
+            if edge_props.get("field") == "stmts":
+                idx = edge_props.get("index")
+                stmts_with_index.append((999999 if idx is None else idx, child_id))
         stmts_with_index.sort(key=lambda t: t[0])
         return [nid for _, nid in stmts_with_index]
 
     def _reconstruct_node(self, nid: str) -> dict[str, Any]:
-        """Recursively reconstruct JSON object for a node.
+        """Reconstruct the JSON object for a node and its whole subtree.
+
+        Iterative rather than recursive: a pre-order pass over an explicit
+        stack records each node's PARENT_OF children, then the dicts are
+        assembled in reverse so every child exists before its parent. Deeply
+        nested expressions therefore cannot hit the recursion limit.
 
         Args:
             nid: Node ID to reconstruct.
 
         Returns:
             Dictionary representing the node in PHP-Parser JSON format.
-        """
-        node = self.node(nid)
-        props = node.all_properties
-        result: dict[str, Any] = {"nodeType": node.node_type}
-
-        attributes = self._extract_attributes(props)
-        if attributes:
-            result["attributes"] = attributes
-
-        self._add_non_attribute_props(result, props)
-        self._reconstruct_child_fields(result, nid)
-        self._add_default_attrs(result, node.node_type)
 
-        return result
+        Raises:
+            KeyError: If nid is not in the graph.
+            ValueError: If the PARENT_OF edges below nid reach a node twice
+                (a cycle or a shared child), so they do not form a tree.
+        """
+        self.node(nid)
+        storage = self.storage
+        order: list[tuple[str, list[tuple[str, Any, str]]]] = []
+        seen = {nid}
+        stack = [nid]
+        while stack:
+            current = stack.pop()
+            children: list[tuple[str, Any, str]] = []
+            for edge_id in storage.out_edges(current):
+                child_id = edge_id[1]
+                if edge_id[2] != "PARENT_OF" or not storage.contains_node(child_id):
+                    continue
+                edge_props = storage.get_edge_props(edge_id) or {}
+                field_name = edge_props.get("field")
+                if field_name is None:
+                    continue
+                if child_id in seen:
+                    raise ValueError(
+                        f"PARENT_OF edges below {nid} reach node {child_id} "
+                        "more than once; the subtree is not a tree"
+                    )
+                seen.add(child_id)
+                children.append((field_name, edge_props.get("index"), child_id))
+                stack.append(child_id)
+            order.append((current, children))
+
+        built: dict[str, dict[str, Any]] = {}
+        for current, children in reversed(order):
+            node = Node(storage, current, self)
+            props = node.all_properties
+            result: dict[str, Any] = {"nodeType": node.node_type}
+
+            attributes = self._extract_attributes(props)
+            if attributes:
+                result["attributes"] = attributes
+
+            self._add_non_attribute_props(result, props)
+            self._reconstruct_child_fields(result, children, built)
+            self._add_default_attrs(result, node.node_type)
+            built[current] = result
+
+        return built[nid]
 
     def _extract_attributes(self, props: dict[str, Any]) -> dict[str, Any]:
         """Extract metadata attributes from node properties.
@@ -289,26 +917,20 @@ class AST(AbcGraphQuerier[Node, Edge]):
             if key not in attr_keys:
                 result[key] = value
 
-    def _reconstruct_child_fields(self, result: dict[str, Any], nid: str) -> None:
-        """Reconstruct and add child fields to result.
+    def _reconstruct_child_fields(
+        self,
+        result: dict[str, Any],
+        children: list[tuple[str, Any, str]],
+        built: dict[str, dict[str, Any]],
+    ) -> None:
+        """Add already-built child objects to result, grouped by edge field.
 
-        Child nodes are fetched via succ() and indexed by edge properties.
+        Children with an edge index become arrays; others are set directly.
         """
-        node = self.node(nid)
         child_fields: dict[str, dict[int, Any]] = {}
 
-        for child in self.succ(node):
-            try:
-                edge = self.edge(nid, child.id, "PARENT_OF")
-            except KeyError:
-                continue
-
-            field_name = edge.get("field")
-            if field_name is None:
-                continue
-
-            child_json = self._reconstruct_node(child.id)
-            index = edge.get("index")
+        for field_name, index, child_id in children:
+            child_json = built[child_id]
 
             if field_name not in child_fields:
                 child_fields[field_name] = {}
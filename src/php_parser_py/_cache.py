@@ -0,0 +1,129 @@
+"""Stat-keyed on-disk cache of PHP-Parser output for project parsing."""
+
+import hashlib
+import logging
+import os
+from pathlib import Path
+
+from ._json import dumps as json_dumps
+from ._json import loads as json_loads
+from ._resources import get_php_parser_release
+
+logger = logging.getLogger(__name__)
+
+
+class ParseCache:
+    """Caches PHP-Parser JSON per file, keyed by (st_mtime_ns, st_size).
+
+    Lives in a sidecar directory inside the project. An index file maps each
+    absolute source path to its stat fingerprint and the blob holding the
+    parsed JSON, so unchanged files cost a single ``stat()`` instead of a
+    read + PHP-Parser run.
+
+    The index also records VERSION_KEY (the cache layout version and the
+    bundled PHP-Parser release); an index written under another key is
+    discarded, so upgrading either never serves stale output.
+
+    Attributes:
+        _cache_dir: Directory holding the index and JSON blobs.
+        _index: Mapping of absolute path to [mtime_ns, size, blob name].
+        _dirty: Whether the index changed since it was loaded.
+    """
+
+    DIR_NAME = ".php_parser_cache"
+    INDEX_NAME = "index.json"
+    FORMAT_VERSION = 2
+    VERSION_KEY = f"{FORMAT_VERSION}:{get_php_parser_release()}"
+
+    def __init__(self, project_path: Path) -> None:
+        """Load the cache index for a project, starting empty if unreadable.
+
+        Args:
+            project_path: Resolved project root directory.
+        """
+        self._cache_dir = project_path / self.DIR_NAME
+        self._index: dict[str, list[object]] = {}
+        self._dirty = False
+
+        index_file = self._cache_dir / self.INDEX_NAME
+        try:
+            loaded = json_loads(index_file.read_bytes())
+        except (OSError, ValueError):
+            return
+        if not isinstance(loaded, dict) or loaded.get("version") != self.VERSION_KEY:
+            return
+        files = loaded.get("files")
+        if isinstance(files, dict):
+            self._index = files
+
+    @property
+    def cache_dir(self) -> Path:
+        """Return the sidecar cache directory."""
+        return self._cache_dir
+
+    @staticmethod
+    def fingerprint(file_path: Path) -> tuple[int, int]:
+        """Return the (st_mtime_ns, st_size) fingerprint of a file."""
+        st = file_path.stat()
+        return st.st_mtime_ns, st.st_size
+
+    def lookup(self, file_path: Path, fingerprint: tuple[int, int]) -> object | None:
+        """Return cached PHP-Parser JSON if the file is unchanged.
+
+        Args:
+            file_path: Absolute source file path.
+            fingerprint: Current fingerprint from fingerprint().
+
+        Returns:
+            Decoded JSON data, or None on a miss or unreadable blob.
+        """
+        entry = self._index.get(str(file_path))
+        if not isinstance(entry, list) or len(entry) != 3:
+            return None
+        mtime_ns, size, blob_name = entry
+        if (mtime_ns, size) != fingerprint:
+            return None
+
+        try:
+            blob = (self._cache_dir / str(blob_name)).read_bytes()
+            data: object = json_loads(blob)
+            return data
+        except (OSError, ValueError):
+            return None
+
+    def store(self, file_path: Path, fingerprint: tuple[int, int], raw: bytes) -> None:
+        """Write the parsed JSON for a file and record it in the index.
+
+        Args:
+            file_path: Absolute source file path.
+            fingerprint: Fingerprint taken before the file was read.
+            raw: PHP-Parser's undecoded JSON output, written as-is.
+        """
+        blob_name = hashlib.md5(str(file_path).encode()).hexdigest() + ".json"
+        try:
+            self._cache_dir.mkdir(parents=True, exist_ok=True)
+            (self._cache_dir / blob_name).write_bytes(raw)
+        except OSError as e:
+            logger.warning("Could not write parse cache for %s: %s", file_path, e)
+            return
+
+        self._index[str(file_path)] = [fingerprint[0], fingerprint[1], blob_name]
+        self._dirty = True
+
+    def save(self) -> None:
+        """Persist the index if it changed, replacing the old one atomically."""
+        if not self._dirty:
+            return
+
+        index_file = self._cache_dir / self.INDEX_NAME
+        tmp_file = index_file.with_suffix(".tmp")
+        try:
+            self._cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp_file.write_bytes(
+                json_dumps({"version": self.VERSION_KEY, "files": self._index})
+            )
+            os.replace(tmp_file, index_file)
+        except OSError as e:
+            logger.warning("Could not save parse cache index: %s", e)
+            return
+        self._dirty = False
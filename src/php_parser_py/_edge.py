@@ -1,9 +1,14 @@
 """Edge class for AST relationships."""
 
-from typing import Any
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any
 
 from cpg2py import AbcEdgeQuerier, Storage
 
+if TYPE_CHECKING:
+    from ._ast import AST
+
 
 class Edge(AbcEdgeQuerier):
     """Represents an edge between AST nodes with generic property access.
@@ -18,10 +23,20 @@ class Edge(AbcEdgeQuerier):
     Attributes:
         _storage: cpg2py Storage instance containing edge data.
         _edge_id: Tuple of (from_id, to_id, edge_type).
+        _owner: AST this edge was obtained from, notified when the edge's
+            properties are changed through set_property/set_properties.
+        _props: The edge's property dict as held by Storage.
     """
 
+    __slots__ = ("_storage", "_edge_id", "_owner", "_props")
+
     def __init__(
-        self, graph: Storage, f_nid: str, t_nid: str, e_type: str = "PARENT_OF"
+        self,
+        graph: Storage,
+        f_nid: str,
+        t_nid: str,
+        e_type: str = "PARENT_OF",
+        owner: AST | None = None,
     ) -> None:
         """Initialize Edge with storage and edge identifiers.
 
@@ -30,10 +45,17 @@ class Edge(AbcEdgeQuerier):
             f_nid: From node ID.
             t_nid: To node ID.
             e_type: Edge type (default: "PARENT_OF").
+            owner: Optional AST to notify when properties are modified.
         """
         super().__init__(graph, f_nid, t_nid, e_type)
         self._storage = graph
         self._edge_id = (str(f_nid), str(t_nid), str(e_type))
+        self._owner = owner
+        # Storage updates an edge's props dict in place for as long as the
+        # edge exists, so hold the live dict rather than re-hashing the edge
+        # ID on every property read
+        props = graph.get_edge_props(self._edge_id)
+        self._props: dict[str, Any] = {} if props is None else props
 
     # Core properties
 
@@ -49,7 +71,57 @@ class Edge(AbcEdgeQuerier):
         Returns:
             Dictionary of edge properties.
         """
-        return self._storage.get_edge_props(self._edge_id) or {}
+        return self._props
+
+    def get_property(self, *prop_names: str) -> Any:
+        """Return the first non-None value among alternative property names.
+
+        Same contract as cpg2py's get_property, but reads the held props
+        dict instead of making one Storage call per name.
+
+        Args:
+            *prop_names: Property names to try, in order.
+
+        Returns:
+            First non-None value found, or None.
+        """
+        props = self._props
+        for name in prop_names:
+            value = props.get(name)
+            if value is not None:
+                return value
+        return None
+
+    # Property updates
+
+    def set_property(self, key: str, value: Any) -> bool:
+        """Set a single edge property and invalidate the owner's caches.
+
+        Args:
+            key: Property key.
+            value: Property value.
+
+        Returns:
+            True if the property was set, False if the edge does not exist.
+        """
+        result: bool = super().set_property(key, value)
+        if self._owner is not None:
+            self._owner._invalidate_caches()
+        return result
+
+    def set_properties(self, props: dict[str, Any]) -> bool:
+        """Update several edge properties and invalidate the owner's caches.
+
+        Args:
+            props: Property key-value pairs.
+
+        Returns:
+            True if the properties were updated, False if the edge does not exist.
+        """
+        result: bool = super().set_properties(props)
+        if self._owner is not None:
+            self._owner._invalidate_caches()
+        return result
 
     # Dict-like access methods
 
@@ -67,7 +139,7 @@ class Edge(AbcEdgeQuerier):
         Raises:
             KeyError: If property doesn't exist.
         """
-        props = self.all_properties
+        props = self._props
         if key not in props:
             raise KeyError(f"Property '{key}' not found in edge {self._edge_id}")
         return props[key]
@@ -83,7 +155,7 @@ class Edge(AbcEdgeQuerier):
         Returns:
             True if property exists, False otherwise.
         """
-        return key in self.all_properties
+        return key in self._props
 
     def get(self, key: str, default: Any = None) -> Any:
         """Get property value with default fallback.
@@ -95,4 +167,4 @@ class Edge(AbcEdgeQuerier):
         Returns:
             Property value or default.
         """
-        return self.all_properties.get(key, default)
+        return self._props.get(key, default)
@@ -3,7 +3,8 @@
 from __future__ import annotations
 
 import logging
-from typing import TYPE_CHECKING
+import sys
+from typing import TYPE_CHECKING, Iterable, NoReturn
 
 from ._edge import Edge
 from ._node import Node
@@ -29,6 +30,8 @@ class Modifier:
         _storage: Reference to the AST's internal Storage.
     """
 
+    __slots__ = ("_ast", "_storage")
+
     def __init__(self, ast: AST) -> None:
         """Wrap an existing AST instance for mutation.
 
@@ -59,13 +62,42 @@ class Modifier:
         Raises:
             ValueError: If node_id already exists in the graph.
         """
-        if self._storage.contains_node(node_id):
+        if not self._storage.add_node(node_id):
             raise ValueError(f"Node already exists: {node_id!r}")
 
-        self._storage.add_node(node_id)
-        all_props: dict[str, object] = {"nodeType": node_type, **props}
+        # Share one string instance per type with the parser-built nodes so
+        # node_type comparisons hit the identity fast path
+        all_props: dict[str, object] = {"nodeType": sys.intern(node_type), **props}
         self._storage.set_node_props(node_id, all_props)
-        return Node(self._storage, node_id)
+        self._ast._invalidate_caches()
+        return Node(self._storage, node_id, self._ast)
+
+    def add_nodes(self, nodes: Iterable[tuple[str, str, dict[str, object]]]) -> None:
+        """Create many nodes in one call without building Node wrappers.
+
+        Bulk counterpart of add_node for graph construction: skips the
+        per-call wrapper allocation and keyword-argument packing. Node
+        types are interned as in add_node; for the parser's already-interned
+        strings that is a single lookup.
+
+        Args:
+            nodes: Iterable of (node_id, node_type, props) tuples.
+
+        Raises:
+            ValueError: If a node_id already exists in the graph. Nodes
+                preceding the offending one remain added.
+        """
+        storage = self._storage
+        intern = sys.intern
+        self._ast._invalidate_caches()
+        for node_id, node_type, props in nodes:
+            if not storage.add_node(node_id):
+                raise ValueError(f"Node already exists: {node_id!r}")
+            # Fill the fresh props dict Storage holds in place; keys are
+            # already strings, so set_node_props' key conversion is skipped
+            node_props = storage.get_node_props(node_id)
+            node_props["nodeType"] = intern(node_type)
+            node_props.update(props)
 
     def remove_node(self, node_id: str) -> None:
         """Remove a node and all its connected edges from the graph.
@@ -76,9 +108,9 @@ class Modifier:
         Raises:
             KeyError: If node_id is not in the graph.
         """
-        if not self._storage.contains_node(node_id):
+        if not self._storage.remove_node(node_id):
             raise KeyError(f"Node not found: {node_id!r}")
-        self._storage.remove_node(node_id)
+        self._ast._invalidate_caches()
 
     # -- Edge Operations --
 
@@ -104,19 +136,53 @@ class Modifier:
             KeyError: If either node does not exist.
             ValueError: If edge already exists.
         """
+        edge_id = (from_id, to_id, sys.intern(edge_type))
+        if not self._storage.add_edge(edge_id):
+            self._raise_edge_refused(edge_id)
+
+        field_name = props.get("field")
+        if isinstance(field_name, str):
+            props["field"] = sys.intern(field_name)
+        if props:
+            self._storage.set_edge_props(edge_id, props)
+        self._ast._invalidate_caches()
+        return Edge(self._storage, from_id, to_id, edge_type, owner=self._ast)
+
+    def add_edges(
+        self, edges: Iterable[tuple[str, str, str, dict[str, object]]]
+    ) -> None:
+        """Create many edges in one call without building Edge wrappers.
+
+        Bulk counterpart of add_edge for graph construction.
+
+        Args:
+            edges: Iterable of (from_id, to_id, edge_type, props) tuples.
+
+        Raises:
+            KeyError: If either endpoint of an edge does not exist.
+            ValueError: If an edge already exists. Edges preceding the
+                offending one remain added.
+        """
+        storage = self._storage
+        self._ast._invalidate_caches()
+        for from_id, to_id, edge_type, props in edges:
+            edge_id = (from_id, to_id, edge_type)
+            # Storage.add_edge already rejects duplicates and missing
+            # endpoints in O(1); only a refused edge needs the reason.
+            if not storage.add_edge(edge_id):
+                self._raise_edge_refused(edge_id)
+            if props:
+                storage.get_edge_props(edge_id).update(props)
+
+    def _raise_edge_refused(self, edge_id: tuple[str, str, str]) -> NoReturn:
+        # Report why Storage.add_edge refused an edge, checking endpoints
+        # first as the Raises sections document.
+        from_id, to_id, _ = edge_id
         if not self._storage.contains_node(from_id):
             raise KeyError(f"Source node not found: {from_id!r}")
         if not self._storage.contains_node(to_id):
             raise KeyError(f"Target node not found: {to_id!r}")
-
-        edge_id = (from_id, to_id, edge_type)
-        if self._storage.contains_edge(edge_id):
-            raise ValueError(f"Edge already exists: {edge_id!r}")
-
-        self._storage.add_edge(edge_id)
-        if props:
-            self._storage.set_edge_props(edge_id, props)
-        return Edge(self._storage, from_id, to_id, edge_type)
+        raise ValueError(f"Edge already exists: {edge_id!r}")
 
     def remove_edge(
         self,
@@ -135,6 +201,6 @@ class Modifier:
             KeyError: If edge is not in the graph.
         """
         edge_id = (from_id, to_id, edge_type)
-        if not self._storage.contains_edge(edge_id):
+        if not self._storage.remove_edge(edge_id):
             raise KeyError(f"Edge not found: {edge_id!r}")
-        self._storage.remove_edge(edge_id)
+        self._ast._invalidate_caches()
@@ -1,9 +1,14 @@
 """Node class for PHP AST nodes."""
 
-from typing import Any
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, Mapping
 
 from cpg2py import AbcNodeQuerier, Storage
 
+if TYPE_CHECKING:
+    from ._ast import AST
+
 
 class Node(AbcNodeQuerier):
     """Wraps a single AST node with dynamic property access to PHP-Parser JSON fields.
@@ -21,14 +26,24 @@ class Node(AbcNodeQuerier):
     Attributes:
         _storage: cpg2py Storage instance containing node data.
         _nid: Unique identifier for this node.
+        _owner: AST this node was obtained from, notified when the node's
+            properties are changed through set_property/set_properties.
+        _props: The node's property dict as held by Storage.
+        _file_props: Props dict of the File node named by the ID prefix ({}
+            if there is none), resolved on first path lookup.
     """
 
-    def __init__(self, storage: Storage, nid: str) -> None:
+    # Slots for this class's own fields; AbcNodeQuerier has no __slots__, so
+    # instances keep a (smaller) __dict__ for the base class's state.
+    __slots__ = ("_storage", "_nid", "_owner", "_props", "_file_props")
+
+    def __init__(self, storage: Storage, nid: str, owner: AST | None = None) -> None:
         """Initialize Node with storage reference and node ID.
 
         Args:
             storage: cpg2py Storage instance containing node data.
             nid: Unique identifier for this node.
+            owner: Optional AST to notify when properties are modified.
 
         Raises:
             Exception: If node ID is not found in storage.
@@ -36,6 +51,12 @@ class Node(AbcNodeQuerier):
         super().__init__(storage, nid)
         self._storage = storage
         self._nid = nid
+        self._owner = owner
+        # Storage updates a node's props dict in place for as long as the
+        # node exists, so every property read below goes straight to it
+        props = storage.get_node_props(nid)
+        self._props: dict[str, Any] = {} if props is None else props
+        self._file_props: dict[str, Any] | None = None
 
     # Core properties
 
@@ -57,7 +78,7 @@ class Node(AbcNodeQuerier):
         Returns:
             Node type string.
         """
-        value = self.get_property("nodeType")
+        value = self._props.get("nodeType")
         if isinstance(value, str):
             return value
         raise TypeError(f"Invalid nodeType for node {self._nid}: {value!r}")
@@ -71,7 +92,57 @@ class Node(AbcNodeQuerier):
         Returns:
             Dictionary containing all properties from PHP-Parser JSON.
         """
-        return self.properties or {}
+        return self._props
+
+    def get_property(self, *prop_names: str) -> Any:
+        """Return the first non-None value among alternative property names.
+
+        Same contract as cpg2py's get_property, but reads the held props
+        dict instead of making one Storage call per name.
+
+        Args:
+            *prop_names: Property names to try, in order.
+
+        Returns:
+            First non-None value found, or None.
+        """
+        props = self._props
+        for name in prop_names:
+            value = props.get(name)
+            if value is not None:
+                return value
+        return None
+
+    # Property updates
+
+    def set_property(self, key: str, value: Any) -> bool:
+        """Set a single node property and invalidate the owner's caches.
+
+        Args:
+            key: Property key.
+            value: Property value.
+
+        Returns:
+            True if the property was set, False if the node does not exist.
+        """
+        result: bool = super().set_property(key, value)
+        if self._owner is not None:
+            self._owner._invalidate_caches()
+        return result
+
+    def set_properties(self, props: dict[str, Any]) -> bool:
+        """Update several node properties and invalidate the owner's caches.
+
+        Args:
+            props: Property key-value pairs.
+
+        Returns:
+            True if the properties were updated, False if the node does not exist.
+        """
+        result: bool = super().set_properties(props)
+        if self._owner is not None:
+            self._owner._invalidate_caches()
+        return result
 
     # Dict-like access methods
 
@@ -89,7 +160,7 @@ class Node(AbcNodeQuerier):
         Raises:
             KeyError: If property doesn't exist.
         """
-        props = self.all_properties
+        props = self._props
         if key not in props:
             raise KeyError(f"Property '{key}' not found in node {self._nid}")
         return props[key]
@@ -105,7 +176,7 @@ class Node(AbcNodeQuerier):
         Returns:
             True if property exists, False otherwise.
         """
-        return key in self.all_properties
+        return key in self._props
 
     def get(self, key: str, default: Any = None) -> Any:
         """Get property value with default fallback.
@@ -117,7 +188,23 @@ class Node(AbcNodeQuerier):
         Returns:
             Property value or default.
         """
-        return self.all_properties.get(key, default)
+        return self._props.get(key, default)
+
+    def matches(self, conditions: Mapping[str, Any]) -> bool:
+        """Check several properties at once against expected values.
+
+        Args:
+            conditions: Property names mapped to the values they must equal.
+
+        Returns:
+            True if every property is present and compares equal, False
+            otherwise. An empty mapping matches any node.
+        """
+        props = self._props
+        for key, value in conditions.items():
+            if key not in props or props[key] != value:
+                return False
+        return True
 
     # PHP-Parser standard attributes (metadata properties)
 
@@ -128,7 +215,7 @@ class Node(AbcNodeQuerier):
         Returns:
             Starting line number.
         """
-        value = self.get_property("startLine")
+        value = self._props.get("startLine")
         if isinstance(value, int):
             return value
         if isinstance(value, str) and value.isdigit():
@@ -142,7 +229,7 @@ class Node(AbcNodeQuerier):
         Returns:
             Ending line number.
         """
-        value = self.get_property("endLine")
+        value = self._props.get("endLine")
         if isinstance(value, int):
             return value
         if isinstance(value, str) and value.isdigit():
@@ -156,7 +243,7 @@ class Node(AbcNodeQuerier):
         Returns:
             Starting byte offset.
         """
-        value = self.get_property("startFilePos")
+        value = self._props.get("startFilePos")
         if isinstance(value, int):
             return value
         if isinstance(value, str) and value.isdigit():
@@ -170,7 +257,7 @@ class Node(AbcNodeQuerier):
         Returns:
             Ending byte offset.
         """
-        value = self.get_property("endFilePos")
+        value = self._props.get("endFilePos")
         if isinstance(value, int):
             return value
         if isinstance(value, str) and value.isdigit():
@@ -184,7 +271,7 @@ class Node(AbcNodeQuerier):
         Returns:
             Starting token index.
         """
-        value = self.get_property("startTokenPos")
+        value = self._props.get("startTokenPos")
         if isinstance(value, int):
             return value
         if isinstance(value, str) and value.isdigit():
@@ -198,7 +285,7 @@ class Node(AbcNodeQuerier):
         Returns:
             Ending token index.
         """
-        value = self.get_property("endTokenPos")
+        value = self._props.get("endTokenPos")
         if isinstance(value, int):
             return value
         if isinstance(value, str) and value.isdigit():
@@ -212,7 +299,7 @@ class Node(AbcNodeQuerier):
         Returns:
             List of Comment objects (may be empty).
         """
-        value = self.get_property("comments")
+        value = self._props.get("comments")
         if isinstance(value, list):
             return value
         raise TypeError(f"Invalid comments for node {self._nid}: {value!r}")
@@ -229,7 +316,7 @@ class Node(AbcNodeQuerier):
         """
         # If this node is a File or Project, get its own relativePath
         if self.node_type in ("File", "Project"):
-            value = self.get_property("relativePath")
+            value = self._props.get("relativePath")
             return value if isinstance(value, str) else None
 
         # For other nodes, try to get from containing file via ID prefix convention
@@ -247,7 +334,7 @@ class Node(AbcNodeQuerier):
         """
         # If this node is a File or Project, get its own absolutePath
         if self.node_type in ("File", "Project"):
-            value = self.get_property("absolutePath")
+            value = self._props.get("absolutePath")
             return value if isinstance(value, str) else None
 
         # For other nodes, try to get from containing file via ID prefix convention
@@ -257,7 +344,8 @@ class Node(AbcNodeQuerier):
         """Get a path property from the containing file node via ID prefix convention.
 
         Node IDs follow the pattern: file_hash_1, file_hash_2, etc.
-        This method extracts the file_hash prefix and retrieves the property from that file node.
+        The file node's props dict is looked up once per Node and kept (it is
+        Storage's live dict), so repeated path reads skip the ID parsing.
 
         Args:
             prop_name: Property name to retrieve ("relativePath" or "absolutePath").
@@ -265,29 +353,22 @@ class Node(AbcNodeQuerier):
         Returns:
             Property value from the file node, or None if not found.
         """
-        if "_" not in self._nid:
-            return None
-
-        # Extract prefix: everything before the last underscore followed by digits
-        last_underscore = self._nid.rfind("_")
-        if last_underscore == -1:
-            return None
-
-        potential_index = self._nid[last_underscore + 1 :]
-        if not potential_index.isdigit():
-            return None
+        file_props = self._file_props
+        if file_props is None:
+            file_props = self._file_props = self._find_file_props()
+        value = file_props.get(prop_name)
+        return value if isinstance(value, str) else None
 
-        # Get the file node with ID = prefix
-        file_id = self._nid[:last_underscore]
-        if not self._storage.contains_node(file_id):
-            return None
+    def _find_file_props(self) -> dict[str, Any]:
+        # Props of the File node named by the ID prefix, or {} if there is none
+        file_id, sep, index = self._nid.rpartition("_")
+        if not sep or not index.isdigit():
+            return {}
 
-        file_props = self._storage.get_node_props(file_id)
+        file_props: dict[str, Any] | None = self._storage.get_node_props(file_id)
         if not file_props or file_props.get("nodeType") != "File":
-            return None
-
-        value = file_props.get(prop_name)
-        return value if isinstance(value, str) else None
+            return {}
+        return file_props
 
     def has_attribute(self, name: str) -> bool:
         """Check if attribute exists.
@@ -298,7 +379,7 @@ class Node(AbcNodeQuerier):
         Returns:
             True if attribute exists, False otherwise.
         """
-        return name in self
+        return name in self._props
 
     def get_attribute(self, name: str, default: Any = None) -> Any:
         """Get attribute value with default.
@@ -310,4 +391,4 @@ class Node(AbcNodeQuerier):
         Returns:
             Attribute value or default.
         """
-        return self.get(name, default)
+        return self._props.get(name, default)
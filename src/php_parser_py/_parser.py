@@ -1,21 +1,138 @@
 """Parser class for PHP code parsing."""
 
 import hashlib
+import json
 import logging
+import os
+import sys
+import threading
+from collections import OrderedDict
 from pathlib import Path
-from typing import Callable, Optional
+from typing import Callable, Iterable, Iterator, Optional, cast
 
 from cpg2py import Storage
 from static_php_py import PHP
 
 from ._ast import AST
+from ._cache import ParseCache
 from ._exceptions import ParseError, RunnerError
+from ._json import loads as json_loads
 from ._modifier import Modifier
 from ._node import Node
-from ._runner import Runner
+from ._runner import Runner, get_runner
 
 logger = logging.getLogger(__name__)
 
+# Pending graph elements collected during a walk and flushed in bulk.
+_NodeBuffer = list[tuple[str, str, dict[str, object]]]
+_EdgeBuffer = list[tuple[str, str, str, dict[str, object]]]
+
+# (file_path, file_hash, stmt_list, raw PHP-Parser JSON if it was kept)
+_FileData = tuple[Path, str, list[dict[str, object]], bytes | None]
+
+# PHP-Parser subnode and attribute names that repeat on almost every node.
+# Keys coming out of json.loads are fresh strings per document, so they are
+# mapped onto these shared instances (and anything else via sys.intern) to
+# cut string count and let dict lookups hit the identity fast path.
+_INTERNED_FIELDS: dict[str, str] = {
+    name: sys.intern(name)
+    for name in (
+        "nodeType",
+        "attributes",
+        "startLine",
+        "endLine",
+        "startFilePos",
+        "endFilePos",
+        "startTokenPos",
+        "endTokenPos",
+        "comments",
+        "kind",
+        "stmts",
+        "expr",
+        "exprs",
+        "name",
+        "namespacedName",
+        "left",
+        "right",
+        "var",
+        "vars",
+        "dim",
+        "args",
+        "params",
+        "value",
+        "key",
+        "items",
+        "cond",
+        "else",
+        "elseifs",
+        "class",
+        "type",
+        "returnType",
+        "default",
+        "byRef",
+        "unpack",
+        "variadic",
+        "flags",
+        "parts",
+        "attrGroups",
+        "props",
+        "consts",
+        "uses",
+    )
+}
+
+
+# Node type names seen so far, mapped to their interned instance. Filled
+# lazily rather than preseeded so no PHP-Parser type list is hardcoded; a
+# project only ever uses a few hundred distinct types.
+_NODE_TYPES: dict[str, str] = {}
+
+
+# Shared PARENT_OF edge property dicts keyed by (field, index). add_edges
+# copies props into the edge's own Storage dict, so one instance per key can be
+# handed out for every edge instead of allocating a throwaway dict each time.
+# Treat the values as read-only.
+_EDGE_PROPS: dict[tuple[str, int | None], dict[str, object]] = {}
+
+
+def _intern(value: str) -> str:
+    # Return the shared instance of a repeated key or node type string.
+    interned = _INTERNED_FIELDS.get(value)
+    return interned if interned is not None else sys.intern(value)
+
+
+def _iter_php_files(
+    root: Path, file_filter: Callable[[Path], bool], skip_dir: Path | None = None
+) -> Iterator[Path]:
+    # Walk root with os.scandir: DirEntry type checks reuse the d_type from
+    # readdir, so only entries that pass the cheap checks are ever stat()ed.
+    # Like Path.rglob, symlinked directories are not descended into and
+    # unreadable directories are skipped, as is skip_dir (the parse cache).
+    # Only the unreadable directory or entry is skipped; errors raised by
+    # file_filter propagate to the caller.
+    skip = str(skip_dir) if skip_dir is not None else None
+    pending = [str(root)]
+    while pending:
+        directory = pending.pop()
+        try:
+            entries = os.scandir(directory)
+        except PermissionError:
+            continue
+        with entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.path != skip:
+                            pending.append(entry.path)
+                        continue
+                    if not entry.is_file():
+                        continue
+                except PermissionError:
+                    continue
+                path = Path(entry.path)
+                if file_filter(path):
+                    yield path
+
 
 class Parser:
     """Parses PHP source code using PHP-Parser.
@@ -24,16 +141,67 @@ class Parser:
     directly — all node/edge creation goes through Modifier.
 
     Attributes:
-        _runner: Runner instance for PHP-Parser invocation.
+        _php: PHP instance the shared Runner is looked up for.
+        _shared_runner: Shared Runner, fetched on first use (see _runner).
+        _retain_json: Whether parsed ASTs keep each file's PHP-Parser JSON.
+        _parse_cache_size: Most sources whose output _parse_cache holds.
+        _parse_cache: LRU of PHP-Parser output keyed by a BLAKE2b digest of
+            the source; stays empty when _parse_cache_size is 0.
+        _parse_cache_lock: Guards _parse_cache.
     """
 
-    def __init__(self, php: Optional[PHP] = None) -> None:
+    def __init__(
+        self,
+        php: Optional[PHP] = None,
+        retain_json: bool = False,
+        parse_cache_size: int = 0,
+    ) -> None:
         """Initialize Parser with Runner.
 
         Args:
             php: Optional PHP instance. If not provided, uses builtin PHP.
+            retain_json: If True, ASTs from parse_file/parse_project keep
+                each file's PHP-Parser JSON so printing an unmodified file
+                can skip re-serializing the graph (see AST.raw_json). Costs
+                the memory of the decoded JSON for every file.
+            parse_cache_size: Number of distinct sources whose PHP-Parser
+                output this Parser keeps, so parsing identical code again
+                skips PHP. The output is many times the size of the source,
+                so caching is off (0) by default.
+
+        Raises:
+            ValueError: If parse_cache_size is negative.
         """
-        self._runner = Runner(php=php)
+        if parse_cache_size < 0:
+            raise ValueError(
+                f"parse_cache_size must not be negative, got {parse_cache_size}"
+            )
+        self._php = php
+        self._shared_runner: Runner | None = None
+        self._retain_json = retain_json
+        self._parse_cache_size = parse_cache_size
+        self._parse_cache: OrderedDict[bytes, bytes] = OrderedDict()
+        self._parse_cache_lock = threading.Lock()
+
+    @property
+    def _runner(self) -> Runner:
+        """Return the shared Runner, looking it up on first use.
+
+        Construction stays cheap for parsers that are created but never
+        used; locating the PHP binary is deferred to the first parse.
+
+        Raises:
+            RunnerError: If PHP binary cannot be located.
+        """
+        runner = self._shared_runner
+        if runner is None:
+            runner = self._shared_runner = get_runner(self._php)
+        return runner
+
+    def clear_cache(self) -> None:
+        """Drop PHP-Parser output this Parser cached (see parse_cache_size)."""
+        with self._parse_cache_lock:
+            self._parse_cache.clear()
 
     def parse_code(self, code: str) -> list[Node]:
         """Parse PHP code string into a list of top-level statement nodes.
@@ -51,20 +219,24 @@ class Parser:
             ParseError: If code has syntax errors.
             RunnerError: If PHP execution fails.
         """
-        json_data = self._parse_php(code)
+        json_data, _ = self._parse_php(code)
         node_list = self._normalize_json(json_data)
 
         modifier = Modifier(AST(Storage(), root_node_id="__code_root__"))
-        node_counter = [1]
+        next_id = 1
         node_ids: list[str] = []
+        nodes: _NodeBuffer = []
+        edges: _EdgeBuffer = []
 
         for item in node_list:
-            node_id = self._process_node(
-                modifier, item, None, None, None, node_counter, ""
+            node_id, next_id = self._process_node(
+                nodes, edges, item, None, None, None, next_id, ""
             )
             if node_id:
                 node_ids.append(node_id)
 
+        modifier.add_nodes(nodes)
+        modifier.add_edges(edges)
         return [modifier.ast.node(nid) for nid in node_ids]
 
     def parse_file(self, path: str) -> AST:
@@ -90,12 +262,11 @@ class Parser:
         project_path = file_path.parent
         file_hash = hashlib.md5(str(file_path).encode()).hexdigest()[:8]
         code = file_path.read_text(encoding="utf-8")
-        json_data = self._parse_php(code)
+        json_data, raw = self._parse_php(code, str(file_path))
         file_list = self._normalize_json(json_data)
 
         modifier = self._build_project_structure(
-            [(file_path, file_list)],
-            [(file_path, file_hash)],
+            [(file_path, file_hash, file_list, raw if self._retain_json else None)],
             project_path=project_path,
         )
         return modifier.ast
@@ -104,6 +275,7 @@ class Parser:
         self,
         project_path: str,
         file_filter: Callable[[Path], bool] = lambda p: p.suffix == ".php",
+        use_cache: bool = False,
     ) -> AST:
         """Parse all PHP files in a project directory into an AST.
 
@@ -114,6 +286,9 @@ class Parser:
             project_path: Project root directory path.
             file_filter: Function to filter files. Takes a Path and returns
                 True if the file should be parsed. Defaults to .php suffix.
+            use_cache: If True, keep PHP-Parser output in a
+                ``.php_parser_cache`` directory under the project and reuse
+                it for files whose mtime and size are unchanged.
 
         Returns:
             AST instance with project -> files -> statements hierarchy.
@@ -130,39 +305,90 @@ class Parser:
         if not project_path_obj.is_dir():
             raise ValueError(f"Project path is not a directory: {project_path}")
 
-        php_files = [
-            f for f in project_path_obj.rglob("*") if f.is_file() and file_filter(f)
-        ]
+        cache = ParseCache(project_path_obj) if use_cache else None
+
+        php_files = list(
+            _iter_php_files(
+                project_path_obj,
+                file_filter,
+                cache.cache_dir if cache is not None else None,
+            )
+        )
 
         if not php_files:
             logger.warning("No PHP files found in project directory: %s", project_path)
             return self._build_empty_project(project_path_obj)
 
-        file_infos = [
-            (fp, hashlib.md5(str(fp).encode()).hexdigest()[:8]) for fp in php_files
-        ]
-
-        all_json_data = []
-        for file_path, _ in file_infos:
-            code = file_path.read_text(encoding="utf-8")
-            json_data = self._parse_php(code, source=str(file_path))
-            all_json_data.append((file_path, self._normalize_json(json_data)))
-
         modifier = self._build_project_structure(
-            all_json_data, file_infos, project_path=project_path_obj
+            self._iter_parsed_files(php_files, cache), project_path=project_path_obj
         )
+        if cache is not None:
+            cache.save()
         return modifier.ast
 
     # -- Internal helpers --
 
-    def _parse_php(self, code: str, source: str = "input") -> object:
-        # Invoke PHP-Parser and translate RunnerError into ParseError.
+    def _parse_raw(self, code: str) -> bytes:
+        # PHP-Parser's undecoded output, from the LRU when caching is on.
+        # Errors raise before anything is stored, so they are never cached.
+        if not self._parse_cache_size:
+            return self._runner.parse_raw(code)
+        key = hashlib.blake2b(code.encode("utf-8"), digest_size=16).digest()
+        with self._parse_cache_lock:
+            cached = self._parse_cache.get(key)
+            if cached is not None:
+                self._parse_cache.move_to_end(key)
+                return cached
+
+        output = self._runner.parse_raw(code)
+        with self._parse_cache_lock:
+            self._parse_cache[key] = output
+            if len(self._parse_cache) > self._parse_cache_size:
+                self._parse_cache.popitem(last=False)
+        return output
+
+    def _parse_php(self, code: str, source: str = "input") -> tuple[object, bytes]:
+        # Invoke PHP-Parser for every entry point and return the decoded JSON
+        # with PHP's undecoded output, so files can retain it for printing or
+        # write it to the parse cache. Errors name the source.
+        try:
+            raw = self._parse_raw(code)
+        except ParseError as e:
+            # PHP-Parser's message does not say which file failed
+            raise ParseError(f"{e.message} in {source}", line=e.line) from e
         try:
-            return self._runner.parse(code)
-        except RunnerError as e:
-            if "Syntax error" in str(e):
-                raise ParseError(f"Syntax error in {source}", line=1) from e
-            raise
+            return json_loads(raw), raw
+        except json.JSONDecodeError as e:
+            raise RunnerError(
+                f"Failed to decode PHP-Parser JSON output: {e}",
+                stderr=str(e),
+                exit_code=1,
+            ) from e
+
+    def _iter_parsed_files(
+        self, php_files: list[Path], cache: ParseCache | None = None
+    ) -> Iterator[_FileData]:
+        # Lazily parse files one at a time so each file's JSON is released
+        # once its graph is built, instead of holding every file's JSON.
+        for file_path in php_files:
+            file_hash = hashlib.md5(str(file_path).encode()).hexdigest()[:8]
+
+            json_data: object | None = None
+            raw: bytes | None = None
+            fingerprint = (0, 0)
+            if cache is not None:
+                fingerprint = cache.fingerprint(file_path)
+                json_data = cache.lookup(file_path, fingerprint)
+
+            if json_data is None:
+                code = file_path.read_text(encoding="utf-8")
+                json_data, raw = self._parse_php(code, str(file_path))
+                if cache is not None:
+                    cache.store(file_path, fingerprint, raw)
+                if not self._retain_json:
+                    raw = None
+
+            yield file_path, file_hash, self._normalize_json(json_data), raw
 
     @staticmethod
     def _normalize_json(json_data: object) -> list[dict[str, object]]:
@@ -191,17 +417,21 @@ class Parser:
 
     def _build_project_structure(
         self,
-        files_data: list[tuple[Path, list[dict[str, object]]]],
-        file_infos: list[tuple[Path, str]],
+        files_data: Iterable[_FileData],
         project_path: Path,
     ) -> Modifier:
         # Build project -> files -> statements hierarchy via Modifier.
+        # files_data yields (file_path, file_hash, stmt_list, raw) and may be
+        # lazy; raw is PHP-Parser's undecoded JSON when it was kept.
         modifier = Modifier(AST(Storage()))
 
         modifier.add_node("project", "Project", absolutePath=str(project_path))
 
-        for (file_path, file_hash), (_, json_data) in zip(file_infos, files_data):
+        retained: list[tuple[str, bytes | list[dict[str, object]]]] = []
+        for file_path, file_hash, json_data, raw in files_data:
             self._add_file_node(modifier, file_path, file_hash, json_data, project_path)
+            if self._retain_json:
+                retained.append((file_hash, raw if raw is not None else json_data))
 
         # Set sentinel position values on project node.
         project_node = modifier.ast.node("project")
@@ -216,6 +446,11 @@ class Parser:
             }
         )
 
+        # Retain only once construction is done: every Modifier call above
+        # invalidates the AST's cached JSON.
+        for file_hash, stmts in retained:
+            modifier.ast._retain_json(file_hash, stmts)
+
         return modifier
 
     def _add_file_node(
@@ -248,12 +483,17 @@ class Parser:
         )
         modifier.add_edge("project", file_hash, field="files")
 
-        node_counter = [1]
+        next_id = 1
+        nodes: _NodeBuffer = []
+        edges: _EdgeBuffer = []
         for idx, item in enumerate(stmt_list):
-            self._process_node(
-                modifier, item, file_hash, "stmts", idx, node_counter, file_hash
+            _, next_id = self._process_node(
+                nodes, edges, item, file_hash, "stmts", idx, next_id, file_hash
             )
 
+        modifier.add_nodes(nodes)
+        modifier.add_edges(edges)
+
     @staticmethod
     def _compute_file_end_positions(
         stmt_list: list[dict[str, object]],
@@ -285,44 +525,64 @@ class Parser:
 
     def _process_node(
         self,
-        modifier: Modifier,
+        nodes: _NodeBuffer,
+        edges: _EdgeBuffer,
         node_data: object,
         parent_id: str | None,
         field_name: str | None,
         index: int | None,
-        node_counter: list[int],
+        next_id: int,
         prefix: str,
-    ) -> str | None:
-        # Recursively convert a PHP-Parser JSON node into graph nodes/edges.
-        if not isinstance(node_data, dict) or "nodeType" not in node_data:
-            return None
+    ) -> tuple[str | None, int]:
+        # Convert a PHP-Parser JSON subtree into graph nodes/edges in one pass,
+        # appending them to the buffers for a later Modifier bulk flush.
+        # Uses an explicit stack instead of recursion so deeply nested
+        # expressions cannot hit the interpreter recursion limit; children are
+        # pushed in reverse so IDs are still assigned in pre-order.
+        # IDs are "{prefix}_{n}" (or "node_{n}" without a prefix) starting at
+        # next_id; the literal part is formatted once so each node only pays a
+        # str(int) concat. The counter stays a local and the next free value
+        # is returned with the root ID, so no state is shared between calls.
+        id_prefix = f"{prefix}_" if prefix else "node_"
+        node_types = _NODE_TYPES
+        edge_props_cache = _EDGE_PROPS
+        root_id: str | None = None
+        stack: list[tuple[object, str | None, str | None, int | None]] = [
+            (node_data, parent_id, field_name, index)
+        ]
 
-        node_id = self._generate_node_id(node_counter, prefix)
-        properties, child_fields = self._extract_node_data(node_data)
+        while stack:
+            data, cur_parent, cur_field, cur_index = stack.pop()
+            if not isinstance(data, dict) or "nodeType" not in data:
+                continue
 
-        node_type_val = properties.pop("nodeType")
-        if not isinstance(node_type_val, str):
-            return None
+            node_id = id_prefix + str(next_id)
+            next_id += 1
+            properties, child_fields = self._extract_node_data(data)
 
-        modifier.add_node(node_id, node_type_val, **properties)
+            # PHP-Parser always emits nodeType as a string
+            raw_type = cast(str, properties.pop("nodeType"))
+            node_type = node_types.get(raw_type)
+            if node_type is None:
+                node_type = node_types[raw_type] = sys.intern(raw_type)
 
-        if parent_id is not None and field_name is not None:
-            if index is not None:
-                modifier.add_edge(parent_id, node_id, field=field_name, index=index)
-            else:
-                modifier.add_edge(parent_id, node_id, field=field_name)
+            nodes.append((node_id, node_type, properties))
+            if root_id is None:
+                root_id = node_id
 
-        self._process_children(modifier, child_fields, node_id, node_counter, prefix)
-        return node_id
+            if cur_parent is not None and cur_field is not None:
+                edge_key = (cur_field, cur_index)
+                edge_props = edge_props_cache.get(edge_key)
+                if edge_props is None:
+                    edge_props = {"field": cur_field}
+                    if cur_index is not None:
+                        edge_props["index"] = cur_index
+                    edge_props_cache[edge_key] = edge_props
+                edges.append((cur_parent, node_id, "PARENT_OF", edge_props))
 
-    @staticmethod
-    def _generate_node_id(node_counter: list[int], prefix: str) -> str:
-        # Generate unique node ID from counter and prefix.
-        current = node_counter[0]
-        node_counter[0] += 1
-        if prefix:
-            return f"{prefix}_{current}"
-        return f"node_{current}"
+            self._push_children(stack, child_fields, node_id)
+
+        return root_id, next_id
 
     @staticmethod
     def _extract_node_data(
@@ -332,9 +592,11 @@ class Parser:
         properties: dict[str, object] = {}
         child_fields: list[tuple[str, object]] = []
 
-        for key, value in node_data.items():
+        for raw_key, value in node_data.items():
+            key = _intern(raw_key)
             if key == "attributes" and isinstance(value, dict):
-                properties.update(value)
+                for attr_key, attr_value in value.items():
+                    properties[_intern(attr_key)] = attr_value
             elif isinstance(value, dict):
                 child_fields.append((key, value))
             elif isinstance(value, list) and value and isinstance(value[0], dict):
@@ -344,28 +606,16 @@ class Parser:
 
         return properties, child_fields
 
-    def _process_children(
-        self,
-        modifier: Modifier,
+    @staticmethod
+    def _push_children(
+        stack: list[tuple[object, str | None, str | None, int | None]],
         child_fields: list[tuple[str, object]],
         parent_id: str,
-        node_counter: list[int],
-        prefix: str,
     ) -> None:
-        # Process child fields recursively.
-        for child_key, child_value in child_fields:
+        # Push child fields onto the work stack in reverse document order.
+        for child_key, child_value in reversed(child_fields):
             if isinstance(child_value, list):
-                for idx, item in enumerate(child_value):
-                    self._process_node(
-                        modifier, item, parent_id, child_key, idx, node_counter, prefix
-                    )
+                for idx in range(len(child_value) - 1, -1, -1):
+                    stack.append((child_value[idx], parent_id, child_key, idx))
             else:
-                self._process_node(
-                    modifier,
-                    child_value,
-                    parent_id,
-                    child_key,
-                    None,
-                    node_counter,
-                    prefix,
-                )
+                stack.append((child_value, parent_id, child_key, None))
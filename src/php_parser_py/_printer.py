@@ -1,12 +1,16 @@
 """PrettyPrinter class for PHP code generation."""
 
 import logging
+import os
+import weakref
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional
 
 from static_php_py import PHP
 
 from php_parser_py._ast import AST
-from php_parser_py._runner import Runner
+from php_parser_py._node import Node
+from php_parser_py._runner import get_runner
 
 logger = logging.getLogger(__name__)
 
@@ -18,21 +22,48 @@ class PrettyPrinter:
     formatted PHP source code for each file.
 
     Attributes:
-        _runner: Runner instance for PHP-Parser invocation.
+        _runner: Shared Runner instance for PHP-Parser invocation.
+        _runners: All runners; print() spreads files across them when there
+            is more than one. ``_runners[0]`` is ``_runner``.
+        _cache_output: Whether generated code is reused across calls.
+        _printed: Per-AST cache of generated code by file node ID (``""``
+            for an AST without files), tagged with the AST version it was
+            printed at. Weakly keyed so cached ASTs can still be collected.
     """
 
     def __init__(
         self,
         php: Optional[PHP] = None,
+        max_workers: int | None = 1,
+        cache_output: bool = False,
     ) -> None:
         """Initialize PrettyPrinter with Runner.
 
         Args:
            php: Optional PHP instance. If not provided, uses builtin PHP.
+           max_workers: Number of PHP worker processes print() may use in
+               parallel for multi-file ASTs, or None for one per CPU.
+               Workers start on first use.
+           cache_output: If True, reuse code already printed for an AST
+               until its version changes. Only tracked mutations change the
+               version, so writes made directly to Storage or to a
+               ``properties`` dict must be followed by AST.mark_modified().
+
+        Raises:
+            ValueError: If max_workers is less than 1.
         """
-        self._runner = Runner(
-            php=php,
-        )
+        if max_workers is None:
+            max_workers = os.cpu_count() or 1
+        if max_workers < 1:
+            raise ValueError(f"max_workers must be at least 1, got {max_workers}")
+
+        # Shared per-process runners: printers for the same PHP reuse one
+        # bootstrapped worker per slot instead of starting their own.
+        self._runners = [get_runner(php, slot=i) for i in range(max_workers)]
+        self._runner = self._runners[0]
+        self._cache_output = cache_output
+        self._printed: weakref.WeakKeyDictionary[AST, tuple[int, dict[str, str]]]
+        self._printed = weakref.WeakKeyDictionary()
 
     def print(self, ast: AST) -> dict[str, str]:
         """Generate PHP code from AST, returning a mapping of file paths to code.
@@ -40,6 +71,9 @@ class PrettyPrinter:
         Args:
             ast: AST instance to convert to code.
 
+        With cache_output, files already printed by this printer are served
+        from its cache while the AST is unmodified (see AST.version).
+
         Returns:
             Dictionary mapping file paths to generated PHP source code strings.
             If AST has no file structure, returns a single entry with key ""
@@ -49,43 +83,70 @@ class PrettyPrinter:
             RunnerError: If PHP-Parser execution fails.
         """
         file_nodes = ast.file_nodes()
+        printed = self._printed_codes(ast)
 
         if not file_nodes:
             # No file structure - export all statements as a single code block
-            json_str = ast.to_json()
-            code = self._runner.print(json_str)
-            return {"": code}
+            return {"": self._print_whole(ast, printed)}
+
+        missing = [f for f in file_nodes if f.id not in printed]
+        if missing:
+            printed.update(
+                zip((f.id for f in missing), self._print_files(ast, missing))
+            )
 
-        # Generate code for each file
         result: dict[str, str] = {}
         for file_node in file_nodes:
             file_path = file_node.get_property("absolutePath", "")
-            file_hash = file_node.id
-
-            # Get JSON for this file only
-            json_str = ast.to_json(file_hash=file_hash)
-
-            # Generate code
-            code = self._runner.print(json_str)
 
             # Use file path as key, or file hash if path not available
-            key = file_path if file_path else file_hash
-            result[key] = code
+            key = file_path if file_path else file_node.id
+            result[key] = printed[file_node.id]
 
         return result
 
-    def print_file(self, ast: AST, relative_path: str) -> str:
+    def _print_files(self, ast: AST, file_nodes: list[Node]) -> list[str]:
+        # Generate code for each file, in order. Each runner pipelines its
+        # share, building JSON for the next file while PHP prints the previous
+        # one; with several runners the shares print in parallel PHP processes.
+        workers = min(len(self._runners), len(file_nodes))
+        if workers <= 1:
+            return self._runner.print_many(
+                self._file_json(ast, file_node) for file_node in file_nodes
+            )
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(
+                    runner.print_many,
+                    (
+                        self._file_json(ast, file_node)
+                        for file_node in file_nodes[i::workers]
+                    ),
+                )
+                for i, runner in enumerate(self._runners[:workers])
+            ]
+            shares = [future.result() for future in futures]
+
+        # File i went to runner i % workers as its (i // workers)-th payload
+        return [shares[i % workers][i // workers] for i in range(len(file_nodes))]
+
+    def print_file(self, ast: AST, relative_path: str | None = None) -> str:
         """Generate PHP code string for a single file selected by relative path.
 
-        This method looks up the file node whose ``path`` property matches the
-        given relative path (as stored on file nodes), reconstructs JSON for
-        that file only, and returns the generated PHP source code string.
+        This method looks up the file node whose ``relativePath`` property
+        matches the given relative path (as stored on file nodes), reconstructs
+        JSON for that file only, and returns the generated PHP source code
+        string. Without a path it prints the first file in print() order,
+        which is the only file for ASTs from Parser.parse_file(), and the
+        whole AST if it has no file structure (as from Parser.parse_code()).
 
         Args:
             ast: AST instance containing project and file nodes.
-            relative_path: Relative file path stored in the ``path`` property
-                of the target file node (for example, ``"src/file.php"`` or
-                just ``"file.php"`` for single-file projects).
+            relative_path: Relative file path stored in the ``relativePath``
+                property of the target file node (for example, ``"src/file.php"`` or
+                just ``"file.php"`` for single-file projects), or None for
+                the first file.
 
         Returns:
             Generated PHP source code string for the specified file.
@@ -95,11 +156,45 @@ class PrettyPrinter:
                 in the AST.
             RunnerError: If PHP-Parser execution fails.
         """
-        # Find file node by its relative path property
-        for file_node in ast.file_nodes():
-            if file_node.get_property("relativePath") == relative_path:
-                file_hash = file_node.id
-                json_str = ast.to_json(file_hash=file_hash)
-                return self._runner.print(json_str)
-
-        raise KeyError(f"File with relative path '{relative_path}' not found in AST.")
+        printed = self._printed_codes(ast)
+        if relative_path is None:
+            file_nodes = ast.file_nodes()
+            if not file_nodes:
+                return self._print_whole(ast, printed)
+            file_node = file_nodes[0]
+        else:
+            # Indexed lookup by relative path (raises KeyError if absent)
+            file_node = ast.file_node_by_path(relative_path)
+
+        code = printed.get(file_node.id)
+        if code is None:
+            code = self._runner.print(self._file_json(ast, file_node))
+            printed[file_node.id] = code
+        return code
+
+    def _print_whole(self, ast: AST, printed: dict[str, str]) -> str:
+        # Code for an AST without file nodes, cached under the "" key.
+        code = printed.get("")
+        if code is None:
+            code = printed[""] = self._runner.print(ast.to_json_bytes())
+        return code
+
+    def _printed_codes(self, ast: AST) -> dict[str, str]:
+        # Return this AST's cached codes, starting over if it was modified
+        # since they were printed. Without cache_output every call starts over.
+        if not self._cache_output:
+            return {}
+        entry = self._printed.get(ast)
+        if entry is None or entry[0] != ast.version:
+            entry = (ast.version, {})
+            self._printed[ast] = entry
+        return entry[1]
+
+    @staticmethod
+    def _file_json(ast: AST, file_node: Node) -> bytes:
+        # Prefer the JSON retained at parse time for unmodified files and
+        # only walk the graph when it is missing or stale.
+        raw = ast.raw_json(file_node.id)
+        if raw is not None:
+            return raw
+        return ast.to_json_bytes(file_hash=file_node.id)
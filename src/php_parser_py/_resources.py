@@ -5,15 +5,24 @@ Handles extraction of bundled PHP-Parser zip file on first import.
 """
 
 import hashlib
+import io
+import logging
+import os
 import threading
 import zipfile
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Optional
 
+logger = logging.getLogger(__name__)
+
 # Global lock for thread-safe extraction
 _extraction_lock = threading.Lock()
 _extraction_state: dict[str, bool] = {"done": False}
 
+# Upper bound for the marker contents: "size:mtime_ns:inode\nsha256hex\n"
+_MARKER_MAX_SIZE = 256
+
 
 def get_vendor_path() -> Path:
     """Get the path where PHP-Parser should be extracted."""
@@ -26,6 +35,31 @@ def get_resources_path() -> Path:
     return Path(__file__).parent / "resources"
 
 
+def _find_zip_name() -> Optional[str]:
+    # The package ships exactly one php-parser-*.zip; resolve its name once
+    # at import instead of globbing the resources directory on every call.
+    try:
+        with os.scandir(get_resources_path()) as entries:
+            for entry in entries:
+                name = entry.name
+                if name.startswith("php-parser-") and name.endswith(".zip"):
+                    return name
+    except OSError:
+        pass
+    return None
+
+
+_ZIP_NAME = _find_zip_name()
+
+
+def get_php_parser_release() -> Optional[str]:
+    """Get the bundled PHP-Parser release name (e.g. "php-parser-4.19.4")."""
+    return _ZIP_NAME[: -len(".zip")] if _ZIP_NAME is not None else None
+
+# Resolved PHP-Parser directory inside vendor, cached by get_php_parser_path
+_php_parser_path: dict[str, Path] = {}
+
+
 def get_marker_file() -> Path:
     """Get the path to the extraction marker file."""
     return get_vendor_path() / ".extracted"
@@ -33,30 +67,47 @@ def get_marker_file() -> Path:
 
 def calculate_zip_hash(zip_path: Path) -> str:
     """Calculate SHA256 hash of the zip file."""
-    sha256_hash = hashlib.sha256()
+    # file_digest runs the read/update loop in C on the raw file descriptor
     with open(zip_path, "rb") as f:
-        for byte_block in iter(lambda: f.read(4096), b""):
-            sha256_hash.update(byte_block)
-    return sha256_hash.hexdigest()
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+def calculate_zip_fingerprint(zip_path: Path) -> str:
+    """Return a cheap "size:mtime_ns:inode" fingerprint of the zip file."""
+    st = zip_path.stat()
+    return f"{st.st_size}:{st.st_mtime_ns}:{st.st_ino}"
 
 
 def is_already_extracted(zip_path: Path) -> bool:
     """
     Check if PHP-Parser has already been extracted.
 
-    Returns True if the marker file exists and the zip hash matches.
+    The marker file holds the zip's stat fingerprint on the first line and
+    its SHA256 hash on the second. Normally only the fingerprint is compared
+    (a single stat, no read); set PHP_PARSER_PY_VERIFY=1 to also re-hash
+    the zip and compare it against the stored hash.
+
+    Returns True if the marker file exists and matches the zip.
     """
-    marker_file = get_marker_file()
-    if not marker_file.exists():
+    # Open directly instead of exists() + read_text(): a missing marker is
+    # just an OSError, and the short ASCII content needs no text layer.
+    try:
+        fd = os.open(get_marker_file(), os.O_RDONLY)
+    except OSError:
         return False
 
-    # Check if hash matches
     try:
-        stored_hash = marker_file.read_text().strip()
-        current_hash = calculate_zip_hash(zip_path)
-        return stored_hash == current_hash
-    except OSError:
-        # If we can't read the marker or calculate hash, re-extract
+        try:
+            stored = os.read(fd, _MARKER_MAX_SIZE).decode("ascii").split()
+        finally:
+            os.close(fd)
+        if not stored or stored[0] != calculate_zip_fingerprint(zip_path):
+            return False
+        if os.environ.get("PHP_PARSER_PY_VERIFY") == "1":
+            return len(stored) > 1 and stored[1] == calculate_zip_hash(zip_path)
+        return True
+    except (OSError, UnicodeDecodeError):
+        # If we can't read the marker or stat/hash the zip, re-extract
         return False
 
 
@@ -71,14 +122,48 @@ def extract_php_parser(zip_path: Path, vendor_path: Path) -> None:
     # Create vendor directory if it doesn't exist
     vendor_path.mkdir(parents=True, exist_ok=True)
 
-    # Extract the zip file
-    with zipfile.ZipFile(zip_path, "r") as zip_ref:
-        zip_ref.extractall(vendor_path)
-
-    # Create marker file with zip hash
+    # Load the archive once, then inflate and write members on several
+    # threads; zlib and file I/O release the GIL so they overlap.
+    zip_bytes = zip_path.read_bytes()
+    with zipfile.ZipFile(io.BytesIO(zip_bytes), "r") as zip_ref:
+        names = zip_ref.namelist()
+
+    workers = min(os.cpu_count() or 1, len(names))
+    if workers <= 1:
+        _extract_members(zip_bytes, names, vendor_path)
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(
+                    _extract_members, zip_bytes, names[i::workers], vendor_path
+                )
+                for i in range(workers)
+            ]
+            for future in futures:
+                future.result()
+
+    # Create marker file with zip fingerprint and hash
+    zip_fingerprint = calculate_zip_fingerprint(zip_path)
     zip_hash = calculate_zip_hash(zip_path)
-    marker_file = get_marker_file()
-    marker_file.write_text(zip_hash)
+    marker = f"{zip_fingerprint}\n{zip_hash}\n".encode("ascii")
+    fd = os.open(get_marker_file(), os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        os.write(fd, marker)
+    finally:
+        os.close(fd)
+
+
+def _extract_members(zip_bytes: bytes, names: list[str], vendor_path: Path) -> None:
+    # Extract a share of the archive. ZipFile objects are not safe to share
+    # between threads, so each share opens its own reader over the bytes.
+    with zipfile.ZipFile(io.BytesIO(zip_bytes), "r") as zip_ref:
+        for name in names:
+            try:
+                zip_ref.extract(name, vendor_path)
+            except FileExistsError:
+                # Another thread created a parent directory between the
+                # existence check and mkdir inside extract(); just retry.
+                zip_ref.extract(name, vendor_path)
 
 
 def ensure_php_parser_extracted() -> Path:
@@ -87,6 +172,10 @@ def ensure_php_parser_extracted() -> Path:
 
     This function is called on package import. It checks if PHP-Parser
     has already been extracted, and if not, extracts it in a thread-safe manner.
+    With PHP_PARSER_PY_PREWARM=1 set, the first successful call also
+    starts the shared PHP worker on a daemon thread so it is ready by the
+    first parse/print. This is opt-in because the import would otherwise
+    spawn a PHP process; Runner.warm_up() does the same explicitly.
 
     Returns:
         Path to the vendor directory containing PHP-Parser
@@ -101,34 +190,48 @@ def ensure_php_parser_extracted() -> Path:
     vendor_path = get_vendor_path()
     resources_path = get_resources_path()
 
-    # Find the php-parser zip file
-    zip_files = list(resources_path.glob("php-parser-*.zip"))
-    if not zip_files:
+    if _ZIP_NAME is None:
         raise FileNotFoundError(
             f"PHP-Parser zip file not found in {resources_path}. "
             f"Expected a file matching pattern 'php-parser-*.zip'"
         )
 
-    zip_path = zip_files[0]
-
-    if is_already_extracted(zip_path):
-        _extraction_state["done"] = True
-        return vendor_path
+    zip_path = resources_path / _ZIP_NAME
 
+    # Only the lock holder checks the marker, so concurrent first callers
+    # don't all stat/hash the zip; later callers take the "done" fast path.
     with _extraction_lock:
-        if is_already_extracted(zip_path):
-            _extraction_state["done"] = True
+        if _extraction_state["done"]:
             return vendor_path
 
-        try:
-            extract_php_parser(zip_path, vendor_path)
-            _extraction_state["done"] = True
-            return vendor_path
+        if not is_already_extracted(zip_path):
+            try:
+                extract_php_parser(zip_path, vendor_path)
+            except (OSError, zipfile.BadZipFile, ValueError) as e:
+                raise RuntimeError(
+                    f"Failed to extract PHP-Parser from {zip_path}: {e}"
+                ) from e
+        _extraction_state["done"] = True
+
+    # Reached once per process: later calls return on the "done" checks.
+    if os.environ.get("PHP_PARSER_PY_PREWARM") == "1":
+        threading.Thread(
+            target=_prewarm_runner, name="php-parser-py-prewarm", daemon=True
+        ).start()
+    return vendor_path
 
-        except (OSError, zipfile.BadZipFile, ValueError) as e:
-            raise RuntimeError(
-                f"Failed to extract PHP-Parser from {zip_path}: {e}"
-            ) from e
+
+def _prewarm_runner() -> None:
+    # Start the shared Runner's PHP worker in the background so the first
+    # parse/print finds PHP and the PHAR already loaded. Best effort: any
+    # failure resurfaces on first real use instead of breaking the import.
+    try:
+        # Deferred: _runner imports this module
+        from ._runner import get_runner
+
+        get_runner().warm_up()
+    except Exception as e:  # pylint: disable=broad-exception-caught
+        logger.debug("PHP worker prewarm failed: %s", e)
 
 
 def get_php_parser_path() -> Optional[Path]:
@@ -138,6 +241,10 @@ def get_php_parser_path() -> Optional[Path]:
     Returns:
         Path to PHP-Parser, or None if not yet extracted
     """
+    cached = _php_parser_path.get("path")
+    if cached is not None:
+        return cached
+
     vendor_path = get_vendor_path()
     if not vendor_path.exists():
         return None
@@ -145,6 +252,7 @@ def get_php_parser_path() -> Optional[Path]:
     # Look for the php-parser directory inside vendor
     php_parser_dirs = list(vendor_path.glob("php-parser-*"))
     if php_parser_dirs:
+        _php_parser_path["path"] = php_parser_dirs[0]
         return php_parser_dirs[0]
 
     return None
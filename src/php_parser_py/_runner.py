@@ -1,18 +1,72 @@
 """Runner class for PHP-Parser invocation."""
 
+import io
 import json
 import logging
+import os
+import queue
 import subprocess
-from typing import Any, Optional, cast
+import tempfile
+import threading
+import weakref
+from typing import IO, Any, Iterable, NoReturn, Optional, cast
 
 from static_php_py import PHP
 from static_php_py.exceptions import BinaryNotFoundError, DownloadError
 
 from php_parser_py._exceptions import ParseError, RunnerError
+from php_parser_py._json import loads as json_loads
 from php_parser_py._resources import ensure_php_parser_extracted
 
 logger = logging.getLogger(__name__)
 
+# One-shot stdin payloads above this size are handed to PHP as a file.
+_STDIN_SPILL_THRESHOLD = 1 << 20
+
+# Worker frame header: 6-byte op/status name + 10-digit payload length.
+_HEADER_SIZE = 16
+_NAME_WIDTH = 6
+
+# Seconds a stopping worker gets to exit after "quit", and again after SIGTERM.
+_SHUTDOWN_TIMEOUT = 0.5
+
+# Process-wide runners shared by Parser and PrettyPrinter instances, keyed by
+# (PHP binary path or None for the builtin PHP, slot). Each keeps its own
+# persistent worker, so callers that need parallel workers take distinct
+# slots while everyone else shares slot 0.
+_runner_cache: dict[tuple[str | None, int], "Runner"] = {}
+_runner_cache_lock = threading.Lock()
+
+# Every Runner in this process, so a forked child can detach them from the
+# parent's PHP workers (see _reset_after_fork).
+_live_runners: "weakref.WeakSet[Runner]" = weakref.WeakSet()
+
+
+def get_runner(php: Optional[PHP] = None, slot: int = 0) -> "Runner":
+    """Return the shared Runner for a PHP binary, creating it on first use.
+
+    Args:
+        php: Optional PHP instance. If not provided, uses builtin PHP.
+        slot: Index of the runner for this binary; distinct slots get
+            distinct Runners and therefore distinct PHP workers.
+
+    Returns:
+        Persistent Runner shared by every caller with the same key.
+
+    Raises:
+        RunnerError: If PHP binary cannot be located.
+    """
+    key = (None if php is None else str(php.path()), slot)
+    runner = _runner_cache.get(key)
+    if runner is not None:
+        return runner
+
+    with _runner_cache_lock:
+        runner = _runner_cache.get(key)
+        if runner is None:
+            runner = _runner_cache[key] = Runner(php=php)
+        return runner
+
 
 class Runner:
     """Manages PHP-Parser invocation via PHP binary.
@@ -20,21 +74,48 @@ class Runner:
     Handles execution of PHP scripts for parsing and code generation,
     communicating with PHP-Parser through subprocess stdin/stdout.
 
+    By default parse and print requests go to one long-lived PHP worker
+    process that loads the PHP-Parser PHAR once, so each call pays only the
+    parse/print work plus a small framing overhead instead of a PHP start-up.
+    Requests and responses are framed with a fixed 16-byte ASCII header (a
+    6-byte space-padded op or status, then a 10-digit payload length)
+    followed by the payload; a lock serializes concurrent callers.
+
     Attributes:
         _php_binary: Path to PHP binary.
         _vendor_dir: Path to directory containing PHP-Parser PHAR.
+        _parse_script: One-shot parse script, built once per Runner.
+        _print_script: One-shot print script, built once per Runner.
+        _worker_script: Persistent worker script, built once per Runner.
+        _persistent: Whether parse/print use the long-lived worker.
+        _worker: Running worker process, or None until first use.
+        _worker_stderr: Temp file collecting the worker's stderr.
+        _worker_finalizer: Stops the worker if the Runner is garbage
+            collected or the interpreter exits without close().
+        _lock: Serializes requests to the worker.
     """
 
-    def __init__(self, php: Optional[PHP] = None) -> None:
+    def __init__(self, php: Optional[PHP] = None, persistent: bool = True) -> None:
         """Initialize Runner with PHP binary wrapper.
 
         Args:
             php: Optional PHP instance. If not provided, uses builtin PHP.
+            persistent: If True (default), keep one PHP worker process alive
+                across calls. If False, spawn a fresh PHP process per call.
 
         Raises:
             RunnerError: If PHP binary cannot be located.
         """
         self._vendor_dir = ensure_php_parser_extracted()
+        # Scripts depend only on the vendor dir, so format them once here
+        self._parse_script = self._build_parse_script()
+        self._print_script = self._build_print_script()
+        self._worker_script = self._build_worker_script()
+        self._persistent = persistent
+        self._worker: Optional[subprocess.Popen[bytes]] = None
+        self._worker_stderr: Optional[IO[bytes]] = None
+        self._worker_finalizer: Optional["weakref.finalize[..., Runner]"] = None
+        self._lock = threading.Lock()
 
         try:
             self._php = php if php is not None else PHP.builtin()
@@ -57,42 +138,73 @@ class Runner:
             raise RunnerError(
                 f"PHP binary not found at {self._php_binary}", exit_code=1
             )
+        _live_runners.add(self)
+
+    def __enter__(self) -> "Runner":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Stop the persistent PHP worker, if one is running.
 
-    def execute(self, script: str, stdin: str = "") -> str:
+        The worker is asked to quit and given a short grace period before it
+        is terminated, then killed. Runners that are never closed are cleaned
+        up the same way when garbage collected or at interpreter exit.
+        """
+        with self._lock:
+            self._stop_worker(graceful=True)
+
+    def warm_up(self) -> None:
+        """Start the persistent PHP worker now instead of on first use.
+
+        The worker loads the PHP-Parser PHAR as soon as it starts, so a later
+        parse/print only pays for its own work. Does nothing if the Runner is
+        not persistent or the worker is already running.
+
+        Raises:
+            RunnerError: If the worker cannot be started.
+        """
+        if not self._persistent:
+            return
+        with self._lock:
+            self._ensure_worker()
+
+    def execute(self, script: str, stdin: bytes = b"") -> bytes:
         """Execute PHP script with optional stdin.
 
+        Pipes are binary: input is passed through as-is and output is
+        returned undecoded, so the text codec only runs on the error path.
+
         Args:
             script: PHP script code to execute.
-            stdin: Optional input to pass to script's stdin.
+            stdin: Optional UTF-8 input to pass to script's stdin.
 
         Returns:
-            Script's stdout output.
+            Script's raw stdout output.
 
         Raises:
             RunnerError: If PHP execution fails.
         """
         try:
-            result = subprocess.run(
-                [str(self._php_binary), "-r", script],
-                input=stdin,
-                capture_output=True,
-                text=True,
-                check=False,
-            )
+            result = self._run_php([str(self._php_binary), "-r", script], stdin)
 
             if result.returncode != 0:
                 # Log complete error information
+                stderr = result.stderr.decode("utf-8", "replace")
+                stdout = result.stdout.decode("utf-8", "replace")
                 error_msg = f"PHP execution failed with exit code {result.returncode}"
-                if result.stderr:
-                    logger.error("PHP stderr: %s", result.stderr)
-                    error_msg += f"\nStderr: {result.stderr}"
-                if result.stdout:
-                    logger.error("PHP stdout: %s", result.stdout)
-                    error_msg += f"\nStdout: {result.stdout}"
+                if stderr:
+                    logger.error("PHP stderr: %s", stderr)
+                    error_msg += f"\nStderr: {stderr}"
+                if stdout:
+                    logger.error("PHP stdout: %s", stdout)
+                    error_msg += f"\nStdout: {stdout}"
 
                 raise RunnerError(
                     error_msg,
-                    stderr=result.stderr,
+                    stderr=stderr,
                     exit_code=result.returncode,
                 )
 
@@ -123,24 +235,11 @@ class Runner:
             ParseError: If PHP-Parser reports syntax error.
             RunnerError: If PHP execution fails.
         """
-        parse_script = self._build_parse_script()
-
+        # parse_raw already routed error responses to ParseError/RunnerError,
+        # so the success path decodes straight away with no result checks.
+        raw = self.parse_raw(code)
         try:
-            output = self.execute(parse_script, code)
-            result = json.loads(output)
-
-            # Check for parse errors
-            if isinstance(result, dict) and "errors" in result:
-                errors = result["errors"]
-                if errors:
-                    first_error = errors[0]
-                    raise ParseError(
-                        first_error.get("message", "Unknown parse error"),
-                        first_error.get("line"),
-                    )
-
-            return cast(dict[str, Any], result)
-
+            return cast(dict[str, Any], json_loads(raw))
         except json.JSONDecodeError as e:
             raise RunnerError(
                 f"Failed to decode PHP-Parser JSON output: {e}",
@@ -148,11 +247,41 @@ class Runner:
                 exit_code=1,
             ) from e
 
-    def print(self, ast_json: str) -> str:
+    def parse_raw(self, code: str) -> bytes:
+        """Invoke PHP-Parser and return its JSON output undecoded.
+
+        For callers that only pass the JSON on (e.g. back to print()), this
+        skips the decode that parse() performs. Successful output is
+        PHP-Parser's statement list, so only output starting with ``{`` (an
+        error object) is decoded, to raise from it.
+
+        Args:
+            code: PHP source code to parse.
+
+        Returns:
+            UTF-8 JSON bytes of PHP-Parser's statement list.
+
+        Raises:
+            ParseError: If PHP-Parser reports syntax error.
+            RunnerError: If PHP execution fails.
+        """
+        source = code.encode("utf-8")
+        if self._persistent:
+            status, output = self._request("parse", source)
+            if status != "ok":
+                self._raise_worker_error(output)
+        else:
+            output = self.execute(self._parse_script, source)
+            if output[:1] == b"{":
+                self._raise_worker_error(output)
+        return output
+
+    def print(self, ast_json: str | bytes) -> str:
         """Invoke PHP-Parser JsonDecoder + PrettyPrinter.
 
         Args:
-            ast_json: AST JSON string from PHP-Parser format.
+            ast_json: AST JSON from PHP-Parser format, as a string or as UTF-8
+                bytes (e.g. from AST.to_json_bytes()), which are passed on as-is.
 
         Returns:
             Generated PHP source code.
@@ -160,15 +289,438 @@ class Runner:
         Raises:
             RunnerError: If PHP execution fails.
         """
-        print_script = self._build_print_script()
-        return self.execute(print_script, ast_json)
+        if self._persistent:
+            payload = ast_json if isinstance(ast_json, bytes) else ast_json.encode()
+            status, body = self._request("print", payload)
+            if status != "ok":
+                self._raise_worker_error(body)
+            return body.decode("utf-8")
+
+        if isinstance(ast_json, str):
+            ast_json = ast_json.encode("utf-8")
+        return self.execute(self._print_script, ast_json).decode("utf-8")
+
+    def print_many(self, ast_jsons: Iterable[str | bytes]) -> list[str]:
+        """Invoke PHP-Parser JsonDecoder + PrettyPrinter for several ASTs.
+
+        With the persistent worker the requests are pipelined: the iterable
+        is consumed on a writer thread while results are read back, so lazy
+        producers (e.g. a generator over AST.to_json_bytes()) overlap with
+        PHP printing. Without it, all payloads go to a single one-shot PHP
+        process instead of one process per payload.
+
+        Args:
+            ast_jsons: AST JSON payloads, as strings or UTF-8 bytes.
+
+        Returns:
+            Generated PHP source code, one entry per payload, in order.
+
+        Raises:
+            RunnerError: If PHP execution fails for any payload.
+        """
+        payloads = (
+            ast_json if isinstance(ast_json, bytes) else ast_json.encode()
+            for ast_json in ast_jsons
+        )
+        if self._persistent:
+            responses = self._request_many("print", payloads)
+        else:
+            responses = self._run_batch("print", payloads)
+
+        codes: list[str] = []
+        for status, body in responses:
+            if status != "ok":
+                self._raise_worker_error(body)
+            codes.append(body.decode("utf-8"))
+        return codes
+
+    # -- Persistent worker --
+
+    def _request(self, op: str, payload: bytes) -> tuple[str, bytes]:
+        """Send one framed request to the worker and read its response.
+
+        Args:
+            op: Operation name understood by the worker script.
+            payload: Request body bytes.
+
+        Returns:
+            Tuple of (status, response body).
+
+        Raises:
+            RunnerError: If the worker cannot be started or dies mid-request.
+        """
+        with self._lock:
+            worker = self._ensure_worker()
+            try:
+                self._write_frame(cast(IO[bytes], worker.stdin), op, payload)
+                return self._read_frame(cast(IO[bytes], worker.stdout))
+            except (OSError, ValueError, EOFError) as e:
+                raise self._worker_failure(worker, op, e) from e
+
+    def _request_many(
+        self, op: str, payloads: Iterable[bytes]
+    ) -> list[tuple[str, bytes]]:
+        """Pipeline several requests through the worker.
+
+        A writer thread pulls payloads from the iterable and sends them while
+        this thread reads responses, so producing payload i+1 (e.g. building
+        JSON from the AST) overlaps with PHP handling request i.
+
+        Args:
+            op: Operation name understood by the worker script.
+            payloads: Request bodies; consumed lazily on the writer thread.
+
+        Returns:
+            List of (status, response body) in request order.
+
+        Raises:
+            RunnerError: If the worker cannot be started or dies mid-request.
+        """
+        with self._lock:
+            worker = self._ensure_worker()
+            # One None per request written, then a final (kind, error) item:
+            # ("done", None), ("write", error) or ("payload", error).
+            sent: queue.SimpleQueue[tuple[str, BaseException | None] | None] = (
+                queue.SimpleQueue()
+            )
+
+            def write_requests() -> None:
+                iterator = iter(payloads)
+                while True:
+                    try:
+                        payload = next(iterator, None)
+                    except BaseException as e:  # pylint: disable=broad-exception-caught
+                        sent.put(("payload", e))
+                        return
+                    if payload is None:
+                        sent.put(("done", None))
+                        return
+                    try:
+                        self._write_frame(stdin, op, payload)
+                    except (OSError, ValueError) as e:
+                        sent.put(("write", e))
+                        return
+                    sent.put(None)
+
+            stdin = cast(IO[bytes], worker.stdin)
+            stdout = cast(IO[bytes], worker.stdout)
+            writer = threading.Thread(target=write_requests, daemon=True)
+            writer.start()
+
+            responses: list[tuple[str, bytes]] = []
+            try:
+                while (item := sent.get()) is None:
+                    responses.append(self._read_frame(stdout))
+                kind, error = item
+                if kind == "write":
+                    raise cast(OSError, error)
+            except (OSError, ValueError, EOFError) as e:
+                failure = self._worker_failure(worker, op, e)
+                writer.join()
+                raise failure from e
+            writer.join()
+
+            # The payload iterable itself failed; every request that was sent
+            # has been answered, so the worker is still usable.
+            if error is not None:
+                raise error
+            return responses
+
+    def _run_batch(
+        self, op: str, payloads: Iterable[bytes]
+    ) -> list[tuple[str, bytes]]:
+        """Run the worker script once over a fixed batch of requests.
+
+        Used when the persistent worker is disabled: every request is framed
+        into one stdin buffer, so K payloads cost one PHP start-up, not K.
+
+        Args:
+            op: Operation name understood by the worker script.
+            payloads: Request bodies.
+
+        Returns:
+            List of (status, response body) in request order.
+
+        Raises:
+            RunnerError: If PHP fails or answers fewer requests than sent.
+        """
+        requests = io.BytesIO()
+        count = 0
+        for payload in payloads:
+            self._write_frame(requests, op, payload)
+            count += 1
+        if count == 0:
+            return []
+
+        try:
+            result = self._run_php(self._worker_command(), requests.getvalue())
+        except OSError as e:
+            error_msg = f"Failed to execute PHP script: {e}"
+            logger.error(error_msg)
+            raise RunnerError(error_msg, stderr=str(e), exit_code=1) from e
+
+        stdout = io.BytesIO(result.stdout)
+        try:
+            return [self._read_frame(stdout) for _ in range(count)]
+        except (ValueError, EOFError) as e:
+            stderr = result.stderr.decode("utf-8", "replace")
+            error_msg = f"PHP execution failed with exit code {result.returncode}"
+            if stderr:
+                logger.error("PHP stderr: %s", stderr)
+                error_msg += f"\nStderr: {stderr}"
+            raise RunnerError(
+                error_msg, stderr=stderr, exit_code=result.returncode or 1
+            ) from e
+
+    @staticmethod
+    def _run_php(cmd: list[str], stdin: bytes) -> subprocess.CompletedProcess[bytes]:
+        """Run a one-shot PHP command, capturing binary stdout and stderr.
+
+        Payloads above _STDIN_SPILL_THRESHOLD are written to an anonymous
+        file (memfd on Linux, unlinked temp file elsewhere) that becomes the
+        child's stdin, so PHP reads them straight from the page cache instead
+        of through a pipe fed chunk by chunk by a writer thread.
+
+        close_fds=False lets CPython start PHP with posix_spawn (vfork-style)
+        instead of fork+exec, so the spawn cost does not grow with the size
+        of this process's heap. Python-created fds are non-inheritable, so
+        nothing extra leaks into the child.
+        """
+        if len(stdin) <= _STDIN_SPILL_THRESHOLD:
+            return subprocess.run(
+                cmd,
+                input=stdin,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                close_fds=False,
+                check=False,
+            )
+
+        stdin_file: IO[bytes]
+        if hasattr(os, "memfd_create"):
+            stdin_file = os.fdopen(
+                os.memfd_create("php_parser_py_stdin", os.MFD_CLOEXEC), "w+b"
+            )
+        else:
+            stdin_file = tempfile.TemporaryFile()
+        with stdin_file:
+            stdin_file.write(stdin)
+            stdin_file.seek(0)
+            return subprocess.run(
+                cmd,
+                stdin=stdin_file,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                close_fds=False,
+                check=False,
+            )
+
+    @staticmethod
+    def _write_frame(stream: IO[bytes], op: str, payload: bytes) -> None:
+        # Frame: fixed-width header followed by the payload bytes.
+        stream.write(f"{op:<{_NAME_WIDTH}}{len(payload):010d}".encode("ascii"))
+        stream.write(payload)
+        stream.flush()
+
+    @staticmethod
+    def _read_frame(stream: IO[bytes]) -> tuple[str, bytes]:
+        # Frame: fixed-width header followed by the body bytes.
+        header = stream.read(_HEADER_SIZE)
+        if len(header) != _HEADER_SIZE:
+            raise EOFError("worker closed its output")
+        length = int(header[_NAME_WIDTH:])
+        body = stream.read(length)
+        if len(body) != length:
+            raise EOFError("truncated response")
+        return header[:_NAME_WIDTH].decode("ascii").rstrip(), body
+
+    def _worker_failure(
+        self, worker: subprocess.Popen[bytes], op: str, error: Exception
+    ) -> RunnerError:
+        """Stop a broken worker and build the RunnerError describing it."""
+        stderr = self._read_worker_stderr()
+        exit_code = worker.poll()
+        self._stop_worker()
+        error_msg = f"PHP worker failed during {op!r} request: {error}"
+        if stderr:
+            logger.error("PHP stderr: %s", stderr)
+            error_msg += f"\nStderr: {stderr}"
+        return RunnerError(
+            error_msg, stderr=stderr, exit_code=exit_code if exit_code else 1
+        )
+
+    def _ensure_worker(self) -> subprocess.Popen[bytes]:
+        """Return the running worker, starting a new one if needed."""
+        if self._worker is not None and self._worker.poll() is None:
+            return self._worker
+
+        self._stop_worker()
+        self._worker_stderr = tempfile.TemporaryFile()
+        try:
+            self._worker = subprocess.Popen(
+                self._worker_command(),
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=self._worker_stderr,
+                # Allows posix_spawn, as in _run_php
+                close_fds=False,
+            )
+        except OSError as e:
+            error_msg = f"Failed to start PHP worker: {e}"
+            logger.error(error_msg)
+            raise RunnerError(error_msg, stderr=str(e), exit_code=1) from e
+        # Holds only the process and its stderr file, never the Runner, so
+        # the Runner can still be collected while a worker is running.
+        self._worker_finalizer = weakref.finalize(
+            self, _shutdown_worker, self._worker, self._worker_stderr, True
+        )
+        return self._worker
+
+    def _worker_command(self) -> list[str]:
+        """Return the argv that runs the worker script."""
+        return [
+            str(self._php_binary),
+            "-d",
+            "error_reporting=E_ALL & ~E_DEPRECATED",
+            "-d",
+            "display_errors=stderr",
+            "-r",
+            self._worker_script,
+        ]
+
+    def _stop_worker(self, graceful: bool = False) -> None:
+        """Stop the worker process and release its pipes and stderr file.
+
+        Args:
+            graceful: Send a quit request and wait briefly before
+                terminating. Only safe when no other thread is writing to
+                the worker, so failure paths stop it forcefully instead.
+        """
+        worker, self._worker = self._worker, None
+        stderr_file, self._worker_stderr = self._worker_stderr, None
+        finalizer, self._worker_finalizer = self._worker_finalizer, None
+        if finalizer is not None:
+            finalizer.detach()
+        if worker is not None:
+            _shutdown_worker(worker, stderr_file, graceful)
+        elif stderr_file is not None:
+            stderr_file.close()
+
+    def _forget_worker_after_fork(self) -> None:
+        """Drop the parent's worker in a forked child without stopping it.
+
+        The worker and its pipes belong to the parent, so the child neither
+        talks to it nor shuts it down; its next request starts a worker of
+        its own. The lock is replaced because a parent thread may have held
+        it at the fork.
+        """
+        if self._worker_finalizer is not None:
+            self._worker_finalizer.detach()
+        self._worker = None
+        self._worker_stderr = None
+        self._worker_finalizer = None
+        self._lock = threading.Lock()
+
+    def _read_worker_stderr(self) -> str:
+        """Return whatever the worker has written to stderr so far."""
+        if self._worker_stderr is None:
+            return ""
+        try:
+            self._worker_stderr.seek(0)
+            return self._worker_stderr.read().decode("utf-8", "replace")
+        except OSError:
+            return ""
+
+    @staticmethod
+    def _raise_worker_error(body: bytes) -> NoReturn:
+        """Raise ParseError or RunnerError for an error response body."""
+        try:
+            result = json.loads(body)
+        except json.JSONDecodeError:
+            result = {}
+
+        if isinstance(result, dict) and result.get("errors"):
+            first_error = result["errors"][0]
+            raise ParseError(
+                first_error.get("message", "Unknown parse error"),
+                first_error.get("line"),
+            )
+
+        message = result.get("error") if isinstance(result, dict) else None
+        raise RunnerError(
+            f"PHP-Parser failed: {message or body.decode('utf-8', 'replace')}",
+            exit_code=1,
+        )
 
     def _build_parse_script(self) -> str:
         """Build PHP script for parsing."""
-        phar_path = self._vendor_dir / "php-parser.phar"
-        return f"""
+        phar_path = str(self._vendor_dir / "php-parser.phar")
+        return _PARSE_SCRIPT.replace("{phar}", phar_path)
+
+    def _build_print_script(self) -> str:
+        """Build PHP script for code generation."""
+        phar_path = str(self._vendor_dir / "php-parser.phar")
+        return _PRINT_SCRIPT.replace("{phar}", phar_path)
+
+    def _build_worker_script(self) -> str:
+        """Build PHP script for the persistent parse/print worker."""
+        phar_path = str(self._vendor_dir / "php-parser.phar")
+        return _WORKER_SCRIPT.replace("{phar}", phar_path)
+
+
+def _shutdown_worker(
+    worker: subprocess.Popen[bytes], stderr_file: Optional[IO[bytes]], graceful: bool
+) -> None:
+    # Stop a worker: optionally "quit" + EOF and a grace period, then
+    # SIGTERM, then SIGKILL. The process is stopped before its pipes are
+    # closed so a thread blocked writing to its stdin fails fast instead of
+    # holding the buffer. Also run by weakref.finalize, so it must not
+    # reference the Runner.
+    if worker.poll() is None and graceful and worker.stdin is not None:
+        try:
+            Runner._write_frame(worker.stdin, "quit", b"")
+            worker.stdin.close()
+            worker.wait(timeout=_SHUTDOWN_TIMEOUT)
+        except (OSError, ValueError, subprocess.TimeoutExpired):
+            pass
+    if worker.poll() is None:
+        worker.terminate()
+        try:
+            worker.wait(timeout=_SHUTDOWN_TIMEOUT)
+        except subprocess.TimeoutExpired:
+            worker.kill()
+            worker.wait()
+    for stream in (worker.stdin, worker.stdout):
+        if stream is not None:
+            try:
+                stream.close()
+            except OSError:
+                pass
+    if stderr_file is not None:
+        stderr_file.close()
+
+
+def _reset_after_fork() -> None:
+    # Runs in a forked child: sharing the parent's worker pipes would
+    # interleave both processes' frames, so every Runner (including the
+    # cached ones Parsers already hold) forgets its worker and starts its
+    # own on next use. The cache lock may have been held at the fork.
+    global _runner_cache_lock
+    _runner_cache_lock = threading.Lock()
+    for runner in list(_live_runners):
+        runner._forget_worker_after_fork()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+# PHP script templates. Plain strings with a single {phar} placeholder that
+# the _build_*_script methods fill in with str.replace, so PHP's braces need
+# no escaping.
+_PARSE_SCRIPT = """
 error_reporting(E_ALL & ~E_DEPRECATED);
-require_once 'phar://{phar_path}/vendor/autoload.php';
+require_once 'phar://{phar}/vendor/autoload.php';
 
 use PhpParser\\ParserFactory;
 use PhpParser\\ErrorHandler\\Collecting;
@@ -177,43 +729,116 @@ $code = file_get_contents('php://stdin');
 $errorHandler = new Collecting();
 $parser = (new ParserFactory())->createForNewestSupportedVersion();
 
-try {{
+try {
     $stmts = $parser->parse($code, $errorHandler);
-    if ($errorHandler->hasErrors()) {{
+    if ($errorHandler->hasErrors()) {
         $errors = array_map(fn($e) => [
             'message' => $e->getMessage(),
             'line' => $e->getStartLine()
         ], $errorHandler->getErrors());
+        // Exit 0 so parse_raw() sees the error object and raises ParseError.
         echo json_encode(['errors' => $errors]);
-        exit(1);
-    }}
-    // PHP-Parser nodes implement JsonSerializable, so we can encode them directly
-    echo json_encode($stmts);
-}} catch (Exception $e) {{
+        exit(0);
+    }
+    // PHP-Parser nodes implement JsonSerializable, so we can encode them directly.
+    // Raw UTF-8 and unescaped slashes keep the payload smaller and cheaper to decode.
+    echo json_encode($stmts, JSON_UNESCAPED_SLASHES | JSON_UNESCAPED_UNICODE);
+} catch (Exception $e) {
     echo json_encode(['error' => $e->getMessage()]);
-    exit(1);
-}}
+    exit(0);
+}
 """
 
-    def _build_print_script(self) -> str:
-        """Build PHP script for code generation."""
-        phar_path = self._vendor_dir / "php-parser.phar"
-        return f"""
+_PRINT_SCRIPT = """
 error_reporting(E_ALL & ~E_DEPRECATED);
-require_once 'phar://{phar_path}/vendor/autoload.php';
+require_once 'phar://{phar}/vendor/autoload.php';
 
 use PhpParser\\JsonDecoder;
 use PhpParser\\PrettyPrinter\\Standard;
 
 $json = file_get_contents('php://stdin');
 
-try {{
+try {
     $decoder = new JsonDecoder();
     $stmts = $decoder->decode($json);
     $printer = new Standard();
     echo $printer->prettyPrintFile($stmts);
-}} catch (Exception $e) {{
+} catch (Exception $e) {
     echo json_encode(['error' => $e->getMessage()]);
     exit(1);
-}}
+}
+"""
+
+_WORKER_SCRIPT = """
+require_once 'phar://{phar}/vendor/autoload.php';
+
+use PhpParser\\ParserFactory;
+use PhpParser\\ErrorHandler\\Collecting;
+use PhpParser\\JsonDecoder;
+use PhpParser\\PrettyPrinter\\Standard;
+
+function read_exact($length) {
+    $data = '';
+    while (strlen($data) < $length) {
+        $chunk = fread(STDIN, $length - strlen($data));
+        if ($chunk === false || $chunk === '') {
+            return null;
+        }
+        $data .= $chunk;
+    }
+    return $data;
+}
+
+function respond($status, $payload) {
+    $data = sprintf('%-6s%010d', $status, strlen($payload)) . $payload;
+    $total = strlen($data);
+    $written = 0;
+    while ($written < $total) {
+        $n = fwrite(STDOUT, substr($data, $written));
+        if ($n === false || $n === 0) {
+            exit(1);
+        }
+        $written += $n;
+    }
+    fflush(STDOUT);
+}
+
+$parser = (new ParserFactory())->createForNewestSupportedVersion();
+$decoder = new JsonDecoder();
+$printer = new Standard();
+
+while (($header = read_exact(16)) !== null) {
+    $op = rtrim(substr($header, 0, 6));
+    $payload = read_exact((int) substr($header, 6));
+    if ($payload === null) {
+        exit(1);
+    }
+
+    try {
+        if ($op === 'parse') {
+            $errorHandler = new Collecting();
+            $stmts = $parser->parse($payload, $errorHandler);
+            if ($errorHandler->hasErrors()) {
+                $errors = array_map(fn($e) => [
+                    'message' => $e->getMessage(),
+                    'line' => $e->getStartLine()
+                ], $errorHandler->getErrors());
+                respond('error', json_encode(['errors' => $errors]));
+            } else {
+                respond('ok', json_encode(
+                    $stmts, JSON_UNESCAPED_SLASHES | JSON_UNESCAPED_UNICODE
+                ));
+            }
+        } elseif ($op === 'print') {
+            $stmts = $decoder->decode($payload);
+            respond('ok', $printer->prettyPrintFile($stmts));
+        } elseif ($op === 'quit') {
+            exit(0);
+        } else {
+            respond('error', json_encode(['error' => 'Unknown op: ' . $op]));
+        }
+    } catch (Throwable $e) {
+        respond('error', json_encode(['error' => $e->getMessage()]));
+    }
+}
 """
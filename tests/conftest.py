@@ -1,20 +1,21 @@
 """Test configuration and fixtures for php-parser-py tests."""
 
-import tempfile
-from pathlib import Path
+import itertools
+from concurrent.futures import ThreadPoolExecutor
 
 import pytest
+from cpg2py import Storage
 
-from php_parser_py import parse_file
+from php_parser_py import Parser, PrettyPrinter, parse_file
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def simple_php_code():
     """Simple PHP code for basic testing."""
     return "<?php echo 'hello world';"
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def function_php_code():
     """PHP code with a function."""
     return """<?php
@@ -25,7 +26,7 @@ function greet($name) {
 """
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def class_php_code():
     """PHP code with a class."""
     return """<?php
@@ -45,7 +46,7 @@ class User {
 """
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def complex_php_code():
     """Complex PHP code with multiple constructs."""
     return """<?php
@@ -75,36 +76,140 @@ class Post {
 """
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def invalid_php_code():
     """Invalid PHP code for error testing."""
     return "<?php function test( { echo 'broken'; }"
 
 
-def parse_code_to_ast(code: str):
-    """Helper function to parse code string into AST using temporary file.
+@pytest.fixture(scope="session")
+def parse_code_to_ast(tmp_path_factory):
+    """Function that parses a PHP code string into a fresh AST.
+
+    Each call writes the code to its own file in one session temporary
+    directory, which pytest removes after the run, and parses that file.
+    For tests that need their own AST, e.g. to re-parse printed code or to
+    check parse errors; read-only tests should use the shared *_ast fixtures.
+    """
+    directory = tmp_path_factory.mktemp("snippets")
+    counter = itertools.count()
+
+    def parse(code: str):
+        path = directory / f"snippet_{next(counter)}.php"
+        path.write_text(code, encoding="utf-8")
+        return parse_file(str(path))
+
+    return parse
+
+
+# Parsed ASTs shared across the whole session. Parsing dominates test time,
+# so tests that only query or print an AST take these instead of parsing the
+# same snippet again. Tests that mutate an AST must parse their own copy.
+
+
+@pytest.fixture(scope="session")
+def parsed_asts(
+    parse_code_to_ast,
+    simple_php_code,
+    function_php_code,
+    class_php_code,
+    complex_php_code,
+):
+    """Parse the four snippet fixtures concurrently, once per session.
+
+    PHP-Parser runs in a worker process and the runner only holds its lock
+    for the request itself, so one snippet's graph building in Python
+    overlaps with the next snippet's parse in PHP.
+    """
+    codes = {
+        "simple": simple_php_code,
+        "function": function_php_code,
+        "class": class_php_code,
+        "complex": complex_php_code,
+    }
+    with ThreadPoolExecutor(max_workers=len(codes)) as pool:
+        futures = {
+            name: pool.submit(parse_code_to_ast, code) for name, code in codes.items()
+        }
+        return {name: future.result() for name, future in futures.items()}
+
+
+@pytest.fixture(scope="session")
+def simple_ast(parsed_asts):
+    """Shared read-only AST of simple_php_code."""
+    return parsed_asts["simple"]
 
-    Args:
-        code: PHP source code string.
 
-    Returns:
-        AST instance with project -> file -> statements hierarchy.
+@pytest.fixture(scope="session")
+def function_ast(parsed_asts):
+    """Shared read-only AST of function_php_code."""
+    return parsed_asts["function"]
+
+
+@pytest.fixture(scope="session")
+def class_ast(parsed_asts):
+    """Shared read-only AST of class_php_code."""
+    return parsed_asts["class"]
+
+
+@pytest.fixture(scope="session")
+def complex_ast(parsed_asts):
+    """Shared read-only AST of complex_php_code."""
+    return parsed_asts["complex"]
+
+
+@pytest.fixture(scope="session")
+def tiny_php_file(tmp_path_factory):
+    """A one-function PHP file written once per session."""
+    path = tmp_path_factory.mktemp("php") / "t.php"
+    path.write_bytes(b"<?php function test() {}")
+    return path
+
+
+@pytest.fixture(scope="session")
+def tiny_php_ast(tiny_php_file):
+    """Shared read-only AST of tiny_php_file."""
+    return parse_file(str(tiny_php_file))
+
+
+@pytest.fixture(scope="session")
+def php_project(tmp_path_factory):
+    """A small project tree written once per session.
+
+    Holds src/file1.php and src/sub/file2.php plus a .phtml and a .txt file
+    that the default file filter skips.
     """
-    with tempfile.NamedTemporaryFile(mode="w", suffix=".php", delete=False) as f:
-        f.write(code)
-        temp_path = f.name
+    root = tmp_path_factory.mktemp("project")
+    sub_dir = root / "src" / "sub"
+    sub_dir.mkdir(parents=True)
+    (root / "src" / "file1.php").write_bytes(b"<?php function a() {}")
+    (sub_dir / "file2.php").write_bytes(b"<?php class B {}")
+    (root / "src" / "file3.phtml").write_bytes(b"<?php echo 'c';")
+    (root / "src" / "file4.txt").write_bytes(b"not php")
+    return root
+
+
+@pytest.fixture(scope="session")
+def project_ast(php_project, shared_parser):
+    """Shared read-only AST of php_project with the default file filter."""
+    return shared_parser.parse_project(str(php_project))
+
 
-    try:
-        return parse_file(temp_path)
-    finally:
-        Path(temp_path).unlink()
+@pytest.fixture(scope="session")
+def shared_parser():
+    """One Parser for every test that needs no special options."""
+    return Parser()
+
+
+@pytest.fixture(scope="session")
+def shared_printer():
+    """One PrettyPrinter for every test that needs no special options."""
+    return PrettyPrinter()
 
 
 @pytest.fixture
 def storage_with_node():
     """Create a storage with a test node for Node tests."""
-    from cpg2py import Storage
-
     storage = Storage()
     storage.add_node("test_node_1")
     storage.set_node_props(
@@ -128,8 +233,6 @@ def storage_with_node():
 @pytest.fixture
 def storage_with_edge():
     """Create a storage with test nodes and an edge for Edge tests."""
-    from cpg2py import Storage
-
     storage = Storage()
     storage.add_node("node1")
     storage.set_node_props("node1", {"nodeType": "Stmt_Echo"})
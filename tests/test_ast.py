@@ -1,168 +1,374 @@
 """Unit tests for AST class."""
 
 import sys
-from pathlib import Path
 
 import pytest
+from cpg2py import AbcGraphQuerier, Storage
 
-# Add tests directory to path to import conftest
-sys.path.insert(0, str(Path(__file__).parent))
-
-from conftest import parse_code_to_ast  # noqa: E402
-
+from php_parser_py import Modifier, NodeNotInFileError
 from php_parser_py._ast import AST
+from php_parser_py._json import dumps, loads
+from php_parser_py._node import Node
 
 
 class TestAST:
     """Test suite for AST class."""
 
-    def test_ast_initialization(self, simple_php_code):
+    def test_ast_initialization(self, simple_ast):
         """Test AST can be created from parser."""
-        ast = parse_code_to_ast(simple_php_code)
+        ast = simple_ast
         assert isinstance(ast, AST)
 
-    def test_nodes_method(self, function_php_code):
+    def test_nodes_method(self, function_ast):
         """Test nodes() method returns all nodes."""
-        ast = parse_code_to_ast(function_php_code)
+        ast = function_ast
 
         nodes = list(ast.nodes())
         assert len(nodes) > 0
-        assert all(hasattr(n, "node_type") for n in nodes)
+        assert all(isinstance(n, Node) for n in nodes)
 
-    def test_nodes_with_predicate(self, function_php_code):
+    def test_nodes_with_predicate(self, function_ast):
         """Test nodes() with predicate filter."""
-        ast = parse_code_to_ast(function_php_code)
+        ast = function_ast
 
         # Find only function nodes
         functions = list(ast.nodes(lambda n: n.node_type == "Stmt_Function"))
         assert len(functions) == 1
         assert functions[0].node_type == "Stmt_Function"
 
-    def test_first_node(self, function_php_code):
+    def test_nodes_of_type(self, class_ast, parse_code_to_ast):
+        """Test nodes_of_type() matches the predicate form and sees changes."""
+        for node_type in ("Stmt_ClassMethod", "File", "Missing_Type"):
+            assert [n.id for n in class_ast.nodes_of_type(node_type)] == [
+                n.id for n in class_ast.nodes(lambda n, t=node_type: n.node_type == t)
+            ]
+
+        ast = parse_code_to_ast("<?php echo 1;")
+        assert list(ast.nodes_of_type("Stmt_Nop")) == []
+        Modifier(ast).add_node("extra", "Stmt_Nop")
+        assert [n.id for n in ast.nodes_of_type("Stmt_Nop")] == ["extra"]
+
+    def test_nodes_of_type_tracks_mutations(self, parse_code_to_ast):
+        """Test nodes_of_type() shares wrappers with nodes() and sees changes."""
+        ast = parse_code_to_ast("<?php function a() {} echo 1;")
+
+        (func,) = ast.nodes_of_type("Stmt_Function")
+        assert ast.count("Stmt_Function") == 1
+        assert any(node is func for node in ast.nodes())
+        assert ast.first_node_of_type("Stmt_Function") is func
+
+        modifier = Modifier(ast)
+        modifier.add_node("extra", "Stmt_Function")
+        assert {n.id for n in ast.nodes_of_type("Stmt_Function")} == {func.id, "extra"}
+        assert ast.count("Stmt_Function") == 2
+
+        modifier.remove_node("extra")
+        assert [n.id for n in ast.nodes_of_type("Stmt_Function")] == [func.id]
+        assert ast.count("Stmt_Function") == 1
+
+    def test_first_node_of_type(self, class_ast):
+        """Test first_node_of_type() matches first_node() with a type predicate."""
+        method = class_ast.first_node_of_type("Stmt_ClassMethod")
+        assert method is not None
+        assert method.id == class_ast.first_node(
+            lambda n: n.node_type == "Stmt_ClassMethod"
+        ).id
+        assert class_ast.first_node_of_type("Missing_Type") is None
+
+    def test_node_type_keyword(self, class_ast):
+        """Test nodes()/first_node() node_type= narrows via the type index."""
+        methods = list(class_ast.nodes_of_type("Stmt_ClassMethod"))
+        assert list(class_ast.nodes(node_type="Stmt_ClassMethod")) == methods
+
+        def is_getter(n):
+            return n.start_line == methods[-1].start_line
+
+        getters = class_ast.nodes(is_getter, node_type="Stmt_ClassMethod")
+        assert list(getters) == [methods[-1]]
+        getter = class_ast.first_node(is_getter, node_type="Stmt_ClassMethod")
+        assert getter is methods[-1]
+        assert class_ast.first_node(node_type="Missing_Type") is None
+
+    def test_where_keyword(self, class_ast):
+        """Test nodes()/first_node() where= matches the equivalent predicate."""
+        method = class_ast.first_node_of_type("Stmt_ClassMethod")
+        where = {"nodeType": "Stmt_ClassMethod", "startLine": method.start_line}
+        assert list(class_ast.nodes(where=where)) == [method]
+        assert class_ast.first_node(where=where) is method
+
+        same_line = {"startLine": method.start_line}
+        assert [n.id for n in class_ast.nodes(where=same_line)] == [
+            n.id for n in class_ast.nodes(lambda n: n.start_line == method.start_line)
+        ]
+        assert class_ast.first_node(where={"nodeType": "Missing_Type"}) is None
+
+    def test_node_ids(self, parse_code_to_ast):
+        """Test node_ids() matches nodes() and sees changes."""
+        ast = parse_code_to_ast("<?php function a() { echo 1; } function b() {}")
+
+        func_ids = list(ast.node_ids(node_type="Stmt_Function"))
+        first_line = list(ast.node_ids(where={"startLine": 1}))
+        assert list(ast.node_ids()) == [n.id for n in ast.nodes()]
+        assert func_ids == [n.id for n in ast.nodes_of_type("Stmt_Function")]
+        assert first_line == [n.id for n in ast.nodes(where={"startLine": 1})]
+        where = {"nodeType": "Stmt_Echo"}
+        assert list(ast.node_ids(node_type="Stmt_Function", where=where)) == []
+
+        Modifier(ast).remove_node(func_ids[-1])
+        assert list(ast.node_ids(node_type="Stmt_Function")) == func_ids[:-1]
+        assert list(ast.node_ids()) == [n.id for n in ast.nodes()]
+
+    def test_first_node(self, function_ast):
         """Test first_node() method."""
-        ast = parse_code_to_ast(function_php_code)
+        ast = function_ast
 
         func = ast.first_node(lambda n: n.node_type == "Stmt_Function")
         assert func is not None
         assert func.node_type == "Stmt_Function"
 
-    def test_first_node_not_found(self, simple_php_code):
+    def test_first_node_tracks_mutations(self, parse_code_to_ast):
+        """Test first_node() finds the earliest match and sees changes."""
+        ast = parse_code_to_ast("<?php echo 1; echo 2;")
+
+        assert ast.first_node().node_type == "Project"
+        echo = ast.first_node(lambda n: n.node_type == "Stmt_Echo")
+        assert echo is not None
+        assert echo.id == next(ast.nodes_of_type("Stmt_Echo")).id
+        assert ast.first_node(node_type="Stmt_Nop") is None
+
+        Modifier(ast).add_node("extra", "Stmt_Nop")
+        assert ast.first_node(node_type="Stmt_Nop").id == "extra"
+
+    def test_first_node_not_found(self, simple_ast):
         """Test first_node() returns None when not found."""
-        ast = parse_code_to_ast(simple_php_code)
+        ast = simple_ast
 
         result = ast.first_node(lambda n: n.node_type == "Stmt_Class")
         assert result is None
 
-    def test_to_json(self, simple_php_code):
+    def test_to_json(self, simple_ast):
         """Test JSON reconstruction."""
-        import json
-
-        ast = parse_code_to_ast(simple_php_code)
+        ast = simple_ast
         json_str = ast.to_json()
         assert isinstance(json_str, str)
 
-        # Parse the JSON string
-        json_data = json.loads(json_str)
+        # Parse the JSON string (orjson when installed)
+        json_data = loads(json_str)
         assert isinstance(json_data, list)
         assert len(json_data) > 0
         assert json_data[0]["nodeType"] == "Stmt_Echo"
 
-    def test_node_count(self, class_php_code):
+    def test_to_python(self, simple_ast):
+        """Test to_python() returns the data to_json() serializes."""
+        data = simple_ast.to_python()
+        assert data[0]["nodeType"] == "Stmt_Echo"
+        assert dumps(data).decode("utf-8") == simple_ast.to_json()
+
+    def test_to_json_bytes_matches_to_json(self, simple_ast):
+        """Test to_json_bytes() is the UTF-8 encoding of to_json()."""
+        ast = simple_ast
+        json_bytes = ast.to_json_bytes()
+        assert isinstance(json_bytes, bytes)
+        assert json_bytes == ast.to_json().encode("utf-8")
+
+    def test_json_reconstruction_beyond_recursion_limit(self):
+        """Test JSON rebuild of a chain deeper than Python's recursion limit."""
+
+        depth = sys.getrecursionlimit() + 100
+        storage = Storage()
+        for i in range(depth):
+            storage.add_node(f"n{i}")
+            storage.set_node_props(f"n{i}", {"nodeType": "Expr_UnaryMinus"})
+            if i:
+                edge_id = (f"n{i - 1}", f"n{i}", "PARENT_OF")
+                storage.add_edge(edge_id)
+                storage.set_edge_props(edge_id, {"field": "expr"})
+        ast = AST(storage, root_node_id="n0")
+
+        current = ast._reconstruct_node("n0")
+        for _ in range(depth - 1):
+            current = current["expr"]
+        assert current == {"nodeType": "Expr_UnaryMinus"}
+
+    def test_json_reconstruction_rejects_cycles(self, parse_code_to_ast):
+        """Test to_json() raises on a PARENT_OF cycle instead of looping."""
+        ast = parse_code_to_ast("<?php $a = 1;")
+        assign = ast.first_node_of_type("Expr_Assign")
+        var = ast.first_node_of_type("Expr_Variable")
+        Modifier(ast).add_edge(var.id, assign.id, field="expr")
+
+        with pytest.raises(ValueError):
+            ast.to_json()
+
+    def test_node_count(self, class_ast):
         """Test counting different node types."""
-        ast = parse_code_to_ast(class_php_code)
-
-        all_nodes = list(ast.nodes())
-        classes = list(ast.nodes(lambda n: n.node_type == "Stmt_Class"))
-        methods = list(ast.nodes(lambda n: n.node_type == "Stmt_ClassMethod"))
-
-        assert len(all_nodes) > len(classes)
-        assert len(classes) == 1
-        assert len(methods) >= 1
-
-    def test_traversal(self, function_php_code):
+        ast = class_ast
+
+        assert ast.count() > ast.count("Stmt_Class")
+        assert ast.count("Stmt_Class") == 1
+        assert ast.count("Stmt_ClassMethod") >= 1
+
+    def test_count(self, class_ast):
+        """Test count matches the nodes it stands in for."""
+        ast = class_ast
+        assert ast.count() == ast.node_count == len(list(ast.nodes()))
+        assert ast.count("Stmt_Class") == 1
+        assert ast.count("Stmt_ClassMethod") == len(
+            list(ast.nodes_of_type("Stmt_ClassMethod"))
+        )
+        assert ast.count("Stmt_Missing") == 0
+
+    def test_traversal(self, function_ast):
         """Test AST traversal finds nested nodes."""
-        ast = parse_code_to_ast(function_php_code)
+        ast = function_ast
 
         # Should find echo statement inside function
-        echos = list(ast.nodes(lambda n: n.node_type == "Stmt_Echo"))
-        assert len(echos) >= 1
+        assert ast.first_node_of_type("Stmt_Echo") is not None
 
-    def test_project_node_properties(self, tmp_path):
+    def test_project_node_properties(self, tiny_php_ast):
         """Test project node has path property."""
-        import os
-        import tempfile
-        from pathlib import Path
-
-        with tempfile.NamedTemporaryFile(mode="w", suffix=".php", delete=False) as f:
-            f.write("<?php function test() {}")
-            temp_file = f.name
-
-        try:
-            from php_parser_py import Parser
+        project = tiny_php_ast.project_node()
+        assert project.get_property("nodeType") == "Project"
+        assert project.get_property("absolutePath") is not None
 
-            parser = Parser()
-            ast = parser.parse_file(temp_file)
-
-            project = ast.project_node()
-            assert project.get_property("nodeType") == "Project"
-            assert project.get_property("absolutePath") is not None
-        finally:
-            os.unlink(temp_file)
-
-    def test_files_method(self, tmp_path):
+    def test_files_method(self, tiny_php_ast):
         """Test file_nodes() method returns file nodes."""
-        import os
-        import tempfile
-        from pathlib import Path
-
-        with tempfile.NamedTemporaryFile(mode="w", suffix=".php", delete=False) as f:
-            f.write("<?php function test() {}")
-            temp_file = f.name
-
-        try:
-            from php_parser_py import Parser
+        files = tiny_php_ast.file_nodes()
+        assert len(files) == 1
 
-            parser = Parser()
-            ast = parser.parse_file(temp_file)
+        file_node = files[0]
+        assert file_node.get_property("nodeType") == "File"
+        assert file_node.get_property("relativePath") is not None
+        assert file_node.get_property("absolutePath") is not None
 
-            files = ast.file_nodes()
-            assert len(files) == 1
-
-            file_node = files[0]
-            assert file_node.get_property("nodeType") == "File"
-            assert file_node.get_property("relativePath") is not None
-            assert file_node.get_property("absolutePath") is not None
-        finally:
-            os.unlink(temp_file)
-
-    def test_get_file_method(self, tmp_path):
+    def test_get_file_method(self, tiny_php_ast):
         """Test get_file() method."""
-        import os
-        import tempfile
-        from pathlib import Path
-
-        with tempfile.NamedTemporaryFile(mode="w", suffix=".php", delete=False) as f:
-            f.write("<?php function test() {}")
-            temp_file = f.name
-
-        try:
-            from php_parser_py import Parser
-
-            parser = Parser()
-            ast = parser.parse_file(temp_file)
-
-            # Get a statement node
-            func_node = ast.first_node(lambda n: n.node_type == "Stmt_Function")
-            assert func_node is not None
-
-            # Get file containing this node
-            file_node = ast.get_file_node(func_node.id)
-            assert file_node.get_property("nodeType") == "File"
-
-            # Project node is not under any file → NodeNotInFileError
-            from php_parser_py import NodeNotInFileError
-
-            with pytest.raises(NodeNotInFileError):
-                ast.get_file_node("project")
-        finally:
-            os.unlink(temp_file)
+        ast = tiny_php_ast
+
+        # Get a statement node
+        func_node = ast.first_node_of_type("Stmt_Function")
+        assert func_node is not None
+
+        # Get file containing this node
+        file_node = ast.get_file_node(func_node.id)
+        assert file_node.get_property("nodeType") == "File"
+
+        # Project node is not under any file → NodeNotInFileError
+        with pytest.raises(NodeNotInFileError):
+            ast.get_file_node("project")
+
+    def test_get_file_node_for_unconventional_ids(self, parse_code_to_ast):
+        """Test get_file_node() resolves nodes whose IDs lack the file prefix."""
+        ast = parse_code_to_ast("<?php function test() {}")
+        file_id = ast.file_nodes()[0].id
+        func_id = ast.first_node_of_type("Stmt_Function").id
+
+        modifier = Modifier(ast)
+        modifier.add_node("inner", "Stmt_Nop")
+        modifier.add_edge(func_id, "inner", field="stmts", index=0)
+        modifier.add_node("orphan", "Stmt_Nop")
+        assert ast.get_file_node("inner").id == file_id
+        with pytest.raises(NodeNotInFileError):
+            ast.get_file_node("orphan")
+
+        modifier.add_edge("inner", "orphan", field="stmts", index=0)
+        assert ast.get_file_node("orphan").id == file_id
+
+    def test_get_file_node_prefix_with_underscore(self):
+        """Test the ID prefix convention splits at the last underscore."""
+        storage = Storage()
+        storage.add_node("file_abc123")
+        storage.set_node_props("file_abc123", {"nodeType": "File"})
+        storage.add_node("file_abc123_1")
+        storage.set_node_props("file_abc123_1", {"nodeType": "Stmt_Echo"})
+        ast = AST(storage, root_node_id="project")
+        assert ast.get_file_node("file_abc123_1").id == "file_abc123"
+
+    def test_file_paths(self, project_ast):
+        """Test file_paths() lists each file node's path in file_nodes() order."""
+        files = project_ast.file_nodes()
+        assert project_ast.file_paths() == [
+            f.get_property("relativePath") for f in files
+        ]
+        assert project_ast.file_paths(absolute=True) == [
+            f.get_property("absolutePath") for f in files
+        ]
+        assert AST(Storage(), root_node_id="missing").file_paths() == []
+
+    def test_file_node_by_path(self, parse_code_to_ast):
+        """Test file_node_by_path() lookup and invalidation on mutation."""
+        ast = parse_code_to_ast("<?php function test() {}")
+
+        file_node = ast.file_nodes()[0]
+        relative_path = file_node.get_property("relativePath")
+        assert ast.file_node_by_path(relative_path).id == file_node.id
+
+        with pytest.raises(KeyError):
+            ast.file_node_by_path("missing.php")
+
+        modifier = Modifier(ast)
+        modifier.add_node("deadbeef", "File", relativePath="b.php")
+        modifier.add_edge("project", "deadbeef")
+        assert ast.file_node_by_path("b.php").id == "deadbeef"
+
+    def test_nodes_cache_tracks_mutations(self, parse_code_to_ast):
+        """Test nodes() and count() reflect each change to the AST."""
+        ast = parse_code_to_ast("<?php echo 1;")
+
+        before = list(ast.nodes())
+        assert list(ast.nodes()) == before
+        assert next(ast.nodes()) is before[0]
+        assert ast.count() == len(before)
+
+        modifier = Modifier(ast)
+        modifier.add_node("extra", "Stmt_Nop")
+        assert [n.id for n in ast.nodes()] == [n.id for n in before] + ["extra"]
+        assert ast.count() == ast.node_count == len(ast) == len(before) + 1
+        assert ast.count("Stmt_Nop") == 1
+
+        modifier.remove_node("extra")
+        assert [n.id for n in ast.nodes()] == [n.id for n in before]
+        assert ast.count() == len(before)
+        assert ast.count("Stmt_Nop") == 0
+
+    def test_structural_signature(
+        self, function_ast, function_php_code, parse_code_to_ast
+    ):
+        """Test structural_signature() ignores IDs/paths but sees type changes."""
+        ast = parse_code_to_ast(function_php_code)
+        assert ast.structural_signature() == function_ast.structural_signature()
+
+        Modifier(ast).add_node("extra", "Stmt_Nop")
+        assert ast.structural_signature() != function_ast.structural_signature()
+
+    def test_descendants_and_ancestors(self, function_ast):
+        """Test BFS traversal order and edge conditions."""
+        ast = function_ast
+        project = ast.project_node()
+        echo = ast.first_node_of_type("Stmt_Echo")
+
+        assert [n.id for n in ast.descendants(project)] == [
+            n.id for n in AbcGraphQuerier.descendants(ast, project)
+        ]
+        ancestor_types = [n.node_type for n in ast.ancestors(echo)]
+        assert ancestor_types[-2:] == ["File", "Project"]
+
+        files_only = list(ast.descendants(project, lambda e: e["field"] == "files"))
+        assert [n.node_type for n in files_only] == ["File"]
+
+    def test_succ_and_prev(self, function_ast):
+        """Test succ()/prev() match the cpg2py base with and without a condition."""
+        ast = function_ast
+        func = ast.first_node_of_type("Stmt_Function")
+
+        def is_stmts(e):
+            return e["field"] == "stmts"
+
+        for method in ("succ", "prev"):
+            base = getattr(AbcGraphQuerier, method)
+            assert [n.id for n in getattr(ast, method)(func)] == [
+                n.id for n in base(ast, func)
+            ]
+            assert [n.id for n in getattr(ast, method)(func, is_stmts)] == [
+                n.id for n in base(ast, func, is_stmts)
+            ]
@@ -12,12 +12,14 @@ class TestEdge:
     def test_edge_initialization(self, storage_with_edge):
         """Test Edge initialization."""
         edge = Edge(storage_with_edge, "node1", "node2", "PARENT_OF")
-        assert edge.edge_type == "PARENT_OF"
+        assert edge.edge_id == ("node1", "node2", "PARENT_OF")
+        assert edge.from_nid == "node1"
+        assert edge.to_nid == "node2"
 
     def test_edge_type_property(self, storage_with_edge):
         """Test type property."""
         edge = Edge(storage_with_edge, "node1", "node2", "PARENT_OF")
-        assert edge.edge_type == "PARENT_OF"
+        assert edge.type == edge.edge_type == "PARENT_OF"
 
     def test_edge_field_via_get(self, storage_with_edge):
         """Test 'field' as generic edge property (PARENT_OF mapping)."""
@@ -67,9 +69,6 @@ class TestEdge:
 
     def test_edge_without_properties(self):
         """Test edge creation without properties."""
-        from cpg2py import Storage
-
-        from php_parser_py._edge import Edge
 
         storage = Storage()
         storage.add_node("node1")
@@ -85,3 +84,21 @@ class TestEdge:
         assert edge.get("field") is None
         assert edge.get("index") is None
         assert edge.all_properties == {}
+
+    def test_get_property_alternatives(self, storage_with_edge):
+        """Test get_property() returns the first non-None alternative."""
+        edge = Edge(storage_with_edge, "node1", "node2", "PARENT_OF")
+        assert edge.get_property("missing", "field") == edge["field"]
+        assert edge.get_property("missing") is None
+
+    def test_properties_track_storage_updates(self, storage_with_edge):
+        """Test an existing Edge sees props changed after it was created."""
+        edge = Edge(storage_with_edge, "node1", "node2", "PARENT_OF")
+        storage_with_edge.set_edge_props(
+            ("node1", "node2", "PARENT_OF"), {"index": 3, "extra": True}
+        )
+        edge.set_property("field", "exprs")
+        assert edge["index"] == 3
+        assert "extra" in edge
+        assert edge.get("field") == "exprs"
+        assert edge.all_properties == {"field": "exprs", "index": 3, "extra": True}
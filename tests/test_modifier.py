@@ -1,5 +1,7 @@
 """Unit tests for Modifier class."""
 
+import sys
+
 import pytest
 from cpg2py import Storage
 
@@ -37,6 +39,33 @@ class TestModifierAddNode:
             modifier.add_node("n1", "Stmt_Return")
 
 
+class TestModifierAddNodes:
+    """Tests for Modifier.add_nodes."""
+
+    def test_add_nodes_creates_all_nodes(self, ast_with_modifier):
+        """Test add_nodes creates every node with its type and properties."""
+        ast, modifier = ast_with_modifier
+        modifier.add_nodes(
+            [("n1", "Stmt_Echo", {"startLine": 1}), ("n2", "Stmt_Return", {})]
+        )
+        assert ast.node("n1").node_type == "Stmt_Echo"
+        assert ast.node("n1").get("startLine") == 1
+        assert ast.node("n2").node_type == "Stmt_Return"
+
+    def test_add_nodes_interns_node_types(self, ast_with_modifier):
+        """Test add_nodes stores the interned instance of each node type."""
+        ast, modifier = ast_with_modifier
+        node_type = "".join(["Stmt_", "Echo"])
+        modifier.add_nodes([("n1", node_type, {})])
+        assert ast.node("n1").node_type is sys.intern(node_type)
+
+    def test_add_nodes_duplicate_raises_value_error(self, ast_with_modifier):
+        """Test add_nodes raises ValueError for existing node ID."""
+        _, modifier = ast_with_modifier
+        with pytest.raises(ValueError, match="already exists"):
+            modifier.add_nodes([("root", "Stmt_Echo", {})])
+
+
 class TestModifierRemoveNode:
     """Tests for Modifier.remove_node."""
 
@@ -81,6 +110,16 @@ class TestModifierAddEdge:
         assert len(children) == 1
         assert children[0].id == "child"
 
+    def test_add_edge_interns_strings(self, ast_with_modifier):
+        """Test add_node/add_edge store interned type and field strings."""
+        ast, modifier = ast_with_modifier
+        node_type = "".join(["Stmt_", "Echo"])
+        field_name = "".join(["st", "mts"])
+        modifier.add_node("child", node_type)
+        modifier.add_edge("root", "child", field=field_name)
+        assert ast.node("child").node_type is sys.intern(node_type)
+        assert ast.edge("root", "child", "PARENT_OF")["field"] is sys.intern("stmts")
+
     def test_add_edge_missing_source_raises_key_error(self, ast_with_modifier):
         """Test add_edge raises KeyError if source node missing."""
         _, modifier = ast_with_modifier
@@ -103,6 +142,29 @@ class TestModifierAddEdge:
             modifier.add_edge("root", "child")
 
 
+class TestModifierAddEdges:
+    """Tests for Modifier.add_edges."""
+
+    def test_add_edges_creates_all_edges(self, ast_with_modifier):
+        """Test add_edges creates edges with their properties."""
+        ast, modifier = ast_with_modifier
+        modifier.add_nodes([("a", "Stmt_Echo", {}), ("b", "Stmt_Echo", {})])
+        modifier.add_edges(
+            [
+                ("root", "a", "PARENT_OF", {"field": "stmts", "index": 0}),
+                ("root", "b", "PARENT_OF", {"field": "stmts", "index": 1}),
+            ]
+        )
+        assert ast.edge("root", "b", "PARENT_OF").get("index") == 1
+        assert {c.id for c in ast.succ(ast.node("root"))} == {"a", "b"}
+
+    def test_add_edges_missing_target_raises_key_error(self, ast_with_modifier):
+        """Test add_edges raises KeyError if target node missing."""
+        _, modifier = ast_with_modifier
+        with pytest.raises(KeyError, match="Target node not found"):
+            modifier.add_edges([("root", "nonexistent", "PARENT_OF", {})])
+
+
 class TestModifierRemoveEdge:
     """Tests for Modifier.remove_edge."""
 
@@ -114,6 +176,16 @@ class TestModifierRemoveEdge:
         modifier.remove_edge("root", "child")
         assert list(ast.succ(ast.node("root"))) == []
 
+    def test_remove_edge_then_edge_lookup_raises(self, ast_with_modifier):
+        """Test ast.edge defaults to PARENT_OF and misses after removal."""
+        ast, modifier = ast_with_modifier
+        modifier.add_node("child", "Stmt_Echo")
+        modifier.add_edge("root", "child")
+        assert ast.edge("root", "child").type == "PARENT_OF"
+        modifier.remove_edge("root", "child")
+        with pytest.raises(KeyError, match="not found"):
+            ast.edge("root", "child")
+
     def test_remove_edge_missing_raises_key_error(self, ast_with_modifier):
         """Test remove_edge raises KeyError for non-existent edge."""
         _, modifier = ast_with_modifier
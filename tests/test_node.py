@@ -19,6 +19,15 @@ class TestNode:
         node = Node(storage_with_node, "test_node_1")
         assert node.node_type == "Stmt_Function"
 
+    def test_properties_track_storage_updates(self, storage_with_node):
+        """Test an existing Node sees props changed after it was created."""
+        node = Node(storage_with_node, "test_node_1")
+        storage_with_node.set_node_props("test_node_1", {"nodeType": "Stmt_Class"})
+        node.set_property("name", "renamed")
+        assert node.node_type == "Stmt_Class"
+        assert node["name"] == "renamed"
+        assert node.all_properties["nodeType"] == "Stmt_Class"
+
     def test_all_properties(self, storage_with_node):
         """Test all_properties returns complete dict."""
         node = Node(storage_with_node, "test_node_1")
@@ -55,6 +64,22 @@ class TestNode:
         assert node.get("nonexistent", "default") == "default"
         assert node.get("nonexistent") is None
 
+    def test_matches(self, storage_with_node):
+        """Test matches() requires every property present and equal."""
+        node = Node(storage_with_node, "test_node_1")
+        assert node.matches({"nodeType": "Stmt_Function", "byRef": False})
+        assert node.matches({})
+        assert not node.matches({"nodeType": "Stmt_Function", "byRef": True})
+        assert not node.matches({"nonexistent": None})
+
+    def test_get_property_alternatives(self, storage_with_node):
+        """Test get_property() returns the first non-None alternative."""
+        node = Node(storage_with_node, "test_node_1")
+        node.set_property("alias", None)
+        assert node.get_property("alias", "missing", "name") == "testFunction"
+        assert node.get_property("byRef") is False
+        assert node.get_property("alias", "missing") is None
+
     def test_start_line_property(self, storage_with_node):
         """Test start_line property."""
         node = Node(storage_with_node, "test_node_1")
@@ -189,6 +214,10 @@ class TestNode:
         assert node.relative_path == "test.php"
         assert node.absolute_path == "/home/user/test.php"
 
+        # The resolved file is kept per node but its paths are read live
+        storage.set_node_props("file_abc123", {"relativePath": "moved.php"})
+        assert node.relative_path == "moved.php"
+
     def test_path_properties_return_none_for_node_without_file_prefix(self):
         """Test that path properties return None for nodes without ID prefix convention."""
         storage = Storage()
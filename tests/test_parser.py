@@ -1,80 +1,96 @@
 """Unit tests for Parser class."""
 
-import sys
+import gc
+import json
+import os
 from pathlib import Path
 
 import pytest
 
-# Add tests directory to path to import conftest
-sys.path.insert(0, str(Path(__file__).parent))
-
-from conftest import parse_code_to_ast  # noqa: E402
-
 from php_parser_py import ParseError, Parser
 from php_parser_py._ast import AST
+from php_parser_py._cache import ParseCache
+from php_parser_py._runner import Runner, get_runner
 
 
 class TestParser:
     """Test suite for Parser class."""
 
-    def test_parser_initialization_creates_runner(self):
+    @pytest.mark.warmup
+    def test_parser_initialization_creates_runner(self, shared_parser):
         """Test Parser initialization creates Runner instance."""
+        assert shared_parser is not None
+        assert hasattr(shared_parser, "_runner")
+
+    def test_parser_looks_up_runner_on_first_use(self, simple_php_code):
+        """Test Parser defers fetching the shared Runner until it parses."""
         parser = Parser()
-        assert parser is not None
-        assert hasattr(parser, "_runner")
+        assert parser._shared_runner is None
+        parser.parse_code(simple_php_code)
+        assert parser._shared_runner is get_runner()
 
-    def test_parse_simple_code_returns_ast_with_nodes(self, simple_php_code):
+    def test_parse_simple_code_returns_ast_with_nodes(self, simple_ast):
         """Test parsing simple PHP code returns AST with nodes."""
-        ast = parse_code_to_ast(simple_php_code)
+        ast = simple_ast
         assert isinstance(ast, AST)
-        assert len(list(ast.nodes())) > 0
+        assert len(ast) > 0
 
-    def test_parse_function_creates_function_node(self, function_php_code):
+    def test_parse_function_creates_function_node(self, function_ast):
         """Test parsing PHP function creates Stmt_Function node."""
-        ast = parse_code_to_ast(function_php_code)
-        functions = list(ast.nodes(lambda n: n.node_type == "Stmt_Function"))
-        assert len(functions) == 1
-        assert functions[0].node_type == "Stmt_Function"
+        ast = function_ast
+        assert ast.count("Stmt_Function") == 1
+        assert ast.first_node_of_type("Stmt_Function").node_type == "Stmt_Function"
 
-    def test_parse_class_creates_class_node(self, class_php_code):
+    def test_parse_class_creates_class_node(self, class_ast):
         """Test parsing PHP class creates Stmt_Class node."""
-        ast = parse_code_to_ast(class_php_code)
-        classes = list(ast.nodes(lambda n: n.node_type == "Stmt_Class"))
-        assert len(classes) == 1
-        assert classes[0].node_type == "Stmt_Class"
+        ast = class_ast
+        assert ast.count("Stmt_Class") == 1
+        assert ast.first_node_of_type("Stmt_Class").node_type == "Stmt_Class"
 
-    def test_parse_complex_code(self, complex_php_code):
+    def test_parse_complex_code(self, complex_ast):
         """Test parsing complex PHP code."""
-        ast = parse_code_to_ast(complex_php_code)
+        ast = complex_ast
 
         # Should have namespace, use, and class
-        namespaces = list(ast.nodes(lambda n: n.node_type == "Stmt_Namespace"))
-        classes = list(ast.nodes(lambda n: n.node_type == "Stmt_Class"))
-
-        assert len(namespaces) >= 1
-        assert len(classes) >= 1
-
-    def test_parse_invalid_code_raises_parse_error(self):
-        """Test parsing invalid PHP code raises ParseError."""
-        from php_parser_py._exceptions import ParseError
+        assert ast.count("Stmt_Namespace") >= 1
+        assert ast.count("Stmt_Use") >= 1
+        assert ast.count("Stmt_Class") >= 1
 
+    def test_parse_invalid_code_raises_parse_error(self, parse_code_to_ast):
+        """Test parsing invalid PHP code raises ParseError naming the file."""
         invalid_php_code = "<?php function test("
 
         with pytest.raises(ParseError) as exc_info:
             parse_code_to_ast(invalid_php_code)
 
-        assert "Syntax error" in str(exc_info.value)
+        assert exc_info.value.message.startswith("Syntax error")
+        assert exc_info.value.message.endswith(".php")
+        assert exc_info.value.line == 1
+
+    def test_parse_project_error_names_file(self, tmp_path, shared_parser):
+        """Test a syntax error in parse_project reports the file and line."""
+        (tmp_path / "good.php").write_text("<?php $a = 1;")
+        bad = tmp_path / "bad.php"
+        bad.write_text("<?php\n$a = 1;\nfunction (")
+
+        with pytest.raises(ParseError) as exc_info:
+            shared_parser.parse_project(str(tmp_path))
+
+        assert exc_info.value.message.endswith(f" in {bad}")
+        assert exc_info.value.line == 3
+        with pytest.raises(ParseError, match=r" in input$"):
+            shared_parser.parse_code("<?php function {")
 
-    def test_parse_empty_code_returns_valid_ast(self):
+    def test_parse_empty_code_returns_valid_ast(self, parse_code_to_ast):
         """Test parsing empty code returns valid AST."""
         ast = parse_code_to_ast("<?php")
         assert isinstance(ast, AST)
 
-    def test_node_attributes(self, function_php_code):
+    def test_node_attributes(self, function_ast):
         """Test that parsed nodes have correct attributes."""
-        ast = parse_code_to_ast(function_php_code)
+        ast = function_ast
 
-        func = ast.first_node(lambda n: n.node_type == "Stmt_Function")
+        func = ast.first_node_of_type("Stmt_Function")
         assert func is not None
         assert func.node_type == "Stmt_Function"
         assert func.start_line == 2
@@ -82,175 +98,231 @@ class TestParser:
         assert "byRef" in func
         assert func["byRef"] is False
 
-    def test_parse_file_nonexistent_raises_file_not_found_error(self):
+    def test_parse_file_nonexistent_raises_file_not_found_error(self, shared_parser):
         """Test parse_file with non-existent file raises FileNotFoundError."""
-        parser = Parser()
         with pytest.raises(FileNotFoundError):
-            parser.parse_file("/nonexistent/file.php")
+            shared_parser.parse_file("/nonexistent/file.php")
 
-    def test_parse_file_path_properties(self, tmp_path):
+    def test_parse_file_path_properties(self, tmp_path, shared_parser):
         """Test parse_file sets correct path properties."""
-        import os
-        import tempfile
-        from pathlib import Path
-
-        # Create a temporary file
-        with tempfile.NamedTemporaryFile(mode="w", suffix=".php", delete=False) as f:
-            f.write("<?php function test() {}")
-            temp_file = f.name
-
-        try:
-            parser = Parser()
-            ast = parser.parse_file(temp_file)
-
-            # Check project node has path property
-            project = ast.project_node()
-            project_path = project.get_property("absolutePath")
-            assert project_path is not None
-            # Use resolve() to handle symlinks (e.g., /var -> /private/var on macOS)
-            assert project_path == str(Path(temp_file).parent.resolve())
-
-            # Check file node has path and filePath properties
-            files = ast.file_nodes()
-            assert len(files) == 1
-            file_node = files[0]
-
-            file_path = file_node.get_property("relativePath")
-            file_abs_path = file_node.get_property("absolutePath")
-
-            assert file_path is not None
-            assert file_abs_path is not None
-            assert file_path == Path(temp_file).name  # Relative path is filename
-            # Use resolve() to handle symlinks
-            assert file_abs_path == str(Path(temp_file).resolve())  # Absolute path
-        finally:
-            os.unlink(temp_file)
-
-    def test_parse_project_path_properties(self, tmp_path):
-        """Test parse_project sets correct path properties."""
-        import tempfile
-        from pathlib import Path
-
-        # Create temporary directory structure
-        with tempfile.TemporaryDirectory() as tmpdir:
-            project_root = Path(tmpdir) / "project"
-            project_root.mkdir()
-
-            src_dir = project_root / "src"
-            src_dir.mkdir()
-
-            file1 = src_dir / "file1.php"
-            file1.write_text("<?php function a() {}")
+        php_file = tmp_path / "test.php"
+        php_file.write_bytes(b"<?php function test() {}")
 
-            file2 = src_dir / "file2.php"
-            file2.write_text("<?php class B {}")
+        ast = shared_parser.parse_file(str(php_file))
+        # Use resolve() to handle symlinks (e.g., /var -> /private/var on macOS)
+        resolved = php_file.resolve()
 
-            parser = Parser()
-            ast = parser.parse_project(str(project_root))
+        # Check project node has path property
+        project = ast.project_node()
+        project_path = project.get_property("absolutePath")
+        assert project_path is not None
+        assert project_path == str(resolved.parent)
 
-            # Check project node has path property
-            project = ast.project_node()
-            project_path = project.get_property("absolutePath")
-            assert project_path is not None
-            assert project_path == str(project_root.resolve())
+        # Check file node has path and filePath properties
+        files = ast.file_nodes()
+        assert len(files) == 1
+        file_node = files[0]
 
-            # Check file nodes have correct path properties
-            files = ast.file_nodes()
-            assert len(files) == 2
+        file_path = file_node.get_property("relativePath")
+        file_abs_path = file_node.get_property("absolutePath")
 
-            file_paths = {file_node.get_property("relativePath") for file_node in files}
-            file_abs_paths = {file_node.get_property("absolutePath") for file_node in files}
+        assert file_path is not None
+        assert file_abs_path is not None
+        assert file_path == php_file.name  # Relative path is filename
+        assert file_abs_path == str(resolved)  # Absolute path
 
-            # Relative paths should be src/file1.php and src/file2.php
-            assert str(Path("src") / "file1.php") in file_paths
-            assert str(Path("src") / "file2.php") in file_paths
-
-            # Absolute paths should contain full paths
-            assert str(file1.resolve()) in file_abs_paths
-            assert str(file2.resolve()) in file_abs_paths
-
-    def test_parse_project_recursive(self, tmp_path):
+    def test_parse_project_path_properties(self, php_project, project_ast):
+        """Test parse_project sets correct path properties."""
+        # Check project node has path property
+        project = project_ast.project_node()
+        project_path = project.get_property("absolutePath")
+        assert project_path is not None
+        root = php_project.resolve()
+        assert project_path == str(root)
+
+        # Each file pairs its project-relative path with its absolute path
+        assert list(
+            zip(project_ast.file_paths(), project_ast.file_paths(absolute=True))
+        ) == [
+            (str(Path("src") / rel), str(root / "src" / rel))
+            for rel in ("file1.php", str(Path("sub") / "file2.php"))
+        ]
+
+    def test_parse_project_recursive(self, project_ast):
         """Test parse_project recursively finds all PHP files."""
-        import tempfile
-        from pathlib import Path
-
-        with tempfile.TemporaryDirectory() as tmpdir:
-            project_root = Path(tmpdir) / "project"
-            project_root.mkdir()
-
-            src_dir = project_root / "src"
-            src_dir.mkdir()
-
-            subdir = src_dir / "sub"
-            subdir.mkdir()
-
-            file1 = src_dir / "file1.php"
-            file1.write_text("<?php function a() {}")
+        # One function from src/, one class from src/sub/
+        assert project_ast.count("File") == 2
+        assert project_ast.count("Stmt_Function") == 1
+        assert project_ast.count("Stmt_Class") == 1
 
-            file2 = subdir / "file2.php"
-            file2.write_text("<?php class B {}")
-
-            parser = Parser()
-            ast = parser.parse_project(str(project_root))
-
-            # Check project node has correct path
-            project = ast.project_node()
-            project_path = project.get_property("absolutePath")
-            assert project_path == str(project_root.resolve())
-
-            # Check all files are found
-            files = ast.file_nodes()
-            assert len(files) == 2
-
-            file_paths = {file_node.get_property("relativePath") for file_node in files}
-            # Relative paths should be src/file1.php and src/sub/file2.php
-            assert str(Path("src") / "file1.php") in file_paths
-            assert str(Path("src") / "sub" / "file2.php") in file_paths
-
-    def test_parse_project_with_file_filter(self, tmp_path):
+    def test_parse_project_with_file_filter(self, php_project, shared_parser):
         """Test parse_project with custom file filter."""
-        import tempfile
-        from pathlib import Path
-
-        with tempfile.TemporaryDirectory() as tmpdir:
-            project_root = Path(tmpdir) / "project"
-            project_root.mkdir()
-
-            src_dir = project_root / "src"
-            src_dir.mkdir()
-
-            file1 = src_dir / "file1.php"
-            file1.write_text("<?php function a() {}")
-
-            file2 = src_dir / "file2.phtml"
-            file2.write_text("<?php class B {}")
-
-            file3 = src_dir / "file3.txt"
-            file3.write_text("not php")
-
-            parser = Parser()
-
-            # Default filter (only .php files)
-            ast1 = parser.parse_project(str(project_root))
-            files1 = ast1.file_nodes()
-            assert len(files1) == 1
-            file_paths1 = {f.get_property("relativePath") for f in files1}
-            assert any("file1.php" in p for p in file_paths1)
-
-            # Custom filter (include .php and .phtml)
-            ast2 = parser.parse_project(
-                str(project_root), file_filter=lambda p: p.suffix in [".php", ".phtml"]
-            )
-            files2 = ast2.file_nodes()
-            assert len(files2) == 2
-            file_paths2 = {f.get_property("relativePath") for f in files2}
-            assert any("file1.php" in p for p in file_paths2)
-            assert any("file2.phtml" in p for p in file_paths2)
-
-            # Custom filter (exclude specific files)
-            ast3 = parser.parse_project(
-                str(project_root),
-                file_filter=lambda p: p.suffix == ".php" and "file1" not in p.name,
-            )
-            files3 = ast3.file_nodes()
-            assert len(files3) == 0  # file1.php is excluded, no other .php files
+        # Custom filter (include .php and .phtml)
+        ast = shared_parser.parse_project(
+            str(php_project), file_filter=lambda p: p.suffix in [".php", ".phtml"]
+        )
+        file_paths = set(ast.file_paths())
+        assert len(file_paths) == 3
+        assert any("file3.phtml" in p for p in file_paths)
+
+        # Custom filter (exclude specific files)
+        ast = shared_parser.parse_project(
+            str(php_project),
+            file_filter=lambda p: p.suffix == ".php" and "file1" not in p.name,
+        )
+        file_paths = set(ast.file_paths())
+        assert file_paths == {str(Path("src") / "sub" / "file2.php")}
+
+        # Nothing selected
+        ast = shared_parser.parse_project(str(php_project), file_filter=lambda p: False)
+        assert ast.file_nodes() == []
+
+    def test_parse_project_filter_errors_propagate(self, tmp_path, shared_parser):
+        """Test an error raised by file_filter is not swallowed by the walk."""
+        for name in ("a.php", "b.php"):
+            (tmp_path / name).write_text("<?php echo 1;")
+
+        def deny_b(path):
+            if path.name == "b.php":
+                raise PermissionError(path)
+            return path.suffix == ".php"
+
+        with pytest.raises(PermissionError):
+            shared_parser.parse_project(str(tmp_path), file_filter=deny_b)
+
+    def test_parse_project_with_cache_reuses_output(self, tmp_path, shared_parser):
+        """Test parse_project(use_cache=True) writes and reuses the cache."""
+        src_dir = tmp_path / "src"
+        src_dir.mkdir()
+        (src_dir / "file1.php").write_bytes(b"<?php function a() {}")
+
+        ast1 = shared_parser.parse_project(str(tmp_path), use_cache=True)
+        assert (tmp_path / ".php_parser_cache" / "index.json").exists()
+
+        ast2 = shared_parser.parse_project(str(tmp_path), use_cache=True)
+        assert len(ast2.file_nodes()) == len(ast1.file_nodes()) == 1
+        assert ast2.node_count == ast1.node_count
+
+    def test_parse_project_cache_discards_other_versions(
+        self, tmp_path, shared_parser
+    ):
+        """Test a cache index written under another version key is ignored."""
+        (tmp_path / "a.php").write_bytes(b"<?php $a = 1;")
+        nested = tmp_path / "sub" / ParseCache.DIR_NAME
+        nested.mkdir(parents=True)
+        (nested / "b.php").write_bytes(b"<?php $b = 2;")
+
+        shared_parser.parse_project(str(tmp_path), use_cache=True)
+        index_file = tmp_path / ParseCache.DIR_NAME / ParseCache.INDEX_NAME
+        index = json.loads(index_file.read_bytes())
+        assert index["version"] == ParseCache.VERSION_KEY
+        assert len(index["files"]) == 2
+        blob = next(iter(index["files"].values()))[2]
+        blob_json = json.loads((index_file.parent / blob).read_bytes())
+        assert isinstance(blob_json, list)
+
+        for entry in index["files"].values():
+            (index_file.parent / entry[2]).write_bytes(b"[]")
+        index["version"] = "0:stale"
+        index_file.write_text(json.dumps(index))
+
+        ast = shared_parser.parse_project(str(tmp_path), use_cache=True)
+        assert len(ast.file_nodes()) == 2
+        assert ast.first_node_of_type("Expr_Assign") is not None
+        assert json.loads(index_file.read_bytes())["version"] == ParseCache.VERSION_KEY
+
+    def test_parser_reuses_persistent_php_worker(self):
+        """Test consecutive parses are served by the same PHP worker process."""
+        # A private runner, so closing it leaves the shared get_runner() one
+        # running for the rest of the suite.
+        runner = Runner(persistent=True)
+        parser = Parser()
+        parser._shared_runner = runner
+        parser.parse_code("<?php $a = 1;")
+        worker = runner._worker
+        assert worker is not None
+
+        parser.parse_code("<?php $b = 2;")
+        assert runner._worker is worker
+
+        runner.close()
+        assert runner._worker is None
+
+    @pytest.mark.parametrize("persistent", [True, False])
+    def test_runner_parse_raw_matches_parse(self, persistent):
+        """Test parse_raw returns undecoded JSON and raises on syntax errors."""
+
+        with Runner(persistent=persistent) as runner:
+            raw = runner.parse_raw("<?php $a = 1;")
+            assert isinstance(raw, bytes)
+            assert json.loads(raw) == runner.parse("<?php $a = 1;")
+
+            with pytest.raises(ParseError) as exc_info:
+                runner.parse_raw("<?php function {")
+            assert exc_info.value.line == 1
+
+    def test_parser_parse_cache(self):
+        """Test parse_cache_size reuses PHP-Parser output until cleared."""
+        uncached = Parser()
+        raw = uncached._parse_raw("<?php $a = 1;")
+        assert uncached._parse_raw("<?php $a = 1;") is not raw
+        assert not uncached._parse_cache
+        with pytest.raises(ValueError):
+            Parser(parse_cache_size=-1)
+
+        parser = Parser(parse_cache_size=2)
+        raw = parser._parse_raw("<?php $a = 1;")
+        assert parser._parse_raw("<?php $a = 1;") is raw
+        assert parser.parse_code("<?php $a = 1;")[0].node_type == "Stmt_Expression"
+
+        parser._parse_raw("<?php $a = 2;")
+        parser._parse_raw("<?php $a = 3;")
+        assert len(parser._parse_cache) == 2
+        assert parser._parse_raw("<?php $a = 1;") is not raw
+
+        parser.clear_cache()
+        assert not parser._parse_cache
+        for _ in range(2):
+            with pytest.raises(ParseError):
+                parser.parse_code("<?php function {")
+        assert not parser._parse_cache
+
+    @pytest.mark.skipif(not hasattr(os, "fork"), reason="requires os.fork")
+    def test_forked_child_starts_its_own_worker(self):
+        """Test a forked child never talks to the parent's PHP worker."""
+        with Runner(persistent=True) as runner:
+            runner.warm_up()
+            parent_worker = runner._worker
+
+            pid = os.fork()
+            if pid == 0:
+                status = 1
+                try:
+                    if runner._worker is None and get_runner()._worker is None:
+                        runner.parse("<?php $child = 1;")
+                        if runner._worker.pid != parent_worker.pid:
+                            status = 0
+                finally:
+                    os._exit(status)
+
+            _, wait_status = os.waitpid(pid, 0)
+            assert os.waitstatus_to_exitcode(wait_status) == 0
+            assert runner._worker is parent_worker
+            assert parent_worker.poll() is None
+            assert runner.parse("<?php $parent = 1;")
+
+    def test_runner_worker_shutdown(self):
+        """Test close() quits the worker cleanly and GC stops a leaked one."""
+
+        runner = Runner()
+        runner.warm_up()
+        worker = runner._worker
+        runner.close()
+        assert worker.returncode == 0
+
+        runner = Runner()
+        runner.warm_up()
+        worker = runner._worker
+        del runner
+        gc.collect()
+        assert worker.poll() is not None
@@ -1,109 +1,192 @@
 """Unit tests for PrettyPrinter class."""
 
-import sys
+import os
 from pathlib import Path
 
 import pytest
 
-# Add tests directory to path to import conftest
-sys.path.insert(0, str(Path(__file__).parent))
-
-from conftest import parse_code_to_ast  # noqa: E402
-
-from php_parser_py import PrettyPrinter
+from php_parser_py import Parser, PrettyPrinter
+from php_parser_py._runner import Runner
 
 
 class TestPrettyPrinter:
     """Test suite for PrettyPrinter class."""
 
-    def test_printer_initialization(self):
+    @pytest.mark.warmup
+    def test_printer_initialization(self, shared_printer):
         """Test PrettyPrinter can be initialized."""
-        printer = PrettyPrinter()
-        assert printer is not None
-
-    def test_print_simple_code(self, simple_php_code):
-        """Test printing simple PHP code."""
-        printer = PrettyPrinter()
+        assert shared_printer is not None
 
-        ast = parse_code_to_ast(simple_php_code)
-        generated = printer.print(ast)
+    def test_print_simple_code(self, simple_ast, shared_printer):
+        """Test print() maps each file's absolute path to its PHP code."""
+        generated = shared_printer.print(simple_ast)
 
         assert isinstance(generated, dict)
-        assert len(generated) > 0
-        # Get first (and likely only) file's code
-        code = list(generated.values())[0]
-        assert "<?php" in code
+        assert list(generated) == simple_ast.file_paths(absolute=True)
+        code = generated[simple_ast.file_paths(absolute=True)[0]]
+        assert code.startswith("<?php")
         assert "echo" in code
 
-    def test_print_function(self, function_php_code):
+    def test_print_function(self, function_ast, shared_printer):
         """Test printing PHP function."""
-        printer = PrettyPrinter()
+        ast = function_ast
+        code = shared_printer.print_file(ast)
 
-        ast = parse_code_to_ast(function_php_code)
-        generated = printer.print(ast)
-
-        assert isinstance(generated, dict)
-        code = list(generated.values())[0]
         assert "function" in code
         assert "greet" in code
         assert "echo" in code
 
-    def test_print_class(self, class_php_code):
+    def test_print_class(self, class_ast, shared_printer):
         """Test printing PHP class."""
-        printer = PrettyPrinter()
+        ast = class_ast
+        code = shared_printer.print_file(ast)
 
-        ast = parse_code_to_ast(class_php_code)
-        generated = printer.print(ast)
-
-        assert isinstance(generated, dict)
-        code = list(generated.values())[0]
         assert "class" in code
         assert "User" in code
         assert "__construct" in code
 
-    def test_roundtrip_simple(self, simple_php_code):
+    @pytest.mark.parametrize(
+        "ast_fixture,node_type",
+        [
+            ("simple_ast", None),
+            ("function_ast", "Stmt_Function"),
+            ("class_ast", "Stmt_Class"),
+        ],
+    )
+    def test_roundtrip(
+        self, request, ast_fixture, node_type, shared_printer, parse_code_to_ast
+    ):
         """Test round-trip: parse → print → parse."""
-        printer = PrettyPrinter()
-
-        # First parse
-        ast1 = parse_code_to_ast(simple_php_code)
-        generated = printer.print(ast1)
-
-        # Get code from dict
-        code = list(generated.values())[0]
-
-        # Second parse
-        ast2 = parse_code_to_ast(code)
-
-        # Should have same number of nodes
-        nodes1 = list(ast1.nodes())
-        nodes2 = list(ast2.nodes())
-        assert len(nodes1) == len(nodes2)
-
-    def test_roundtrip_function(self, function_php_code):
-        """Test round-trip with function."""
-        printer = PrettyPrinter()
-
-        ast1 = parse_code_to_ast(function_php_code)
-        generated = printer.print(ast1)
-        code = list(generated.values())[0]
-        ast2 = parse_code_to_ast(code)
-
-        # Should have same function
-        funcs1 = list(ast1.nodes(lambda n: n.node_type == "Stmt_Function"))
-        funcs2 = list(ast2.nodes(lambda n: n.node_type == "Stmt_Function"))
-        assert len(funcs1) == len(funcs2) == 1
-
-    def test_roundtrip_class(self, class_php_code):
-        """Test round-trip with class."""
-        printer = PrettyPrinter()
-
-        ast1 = parse_code_to_ast(class_php_code)
-        generated = printer.print(ast1)
-        code = list(generated.values())[0]
+        ast1 = request.getfixturevalue(ast_fixture)
+        code = shared_printer.print_file(ast1)
         ast2 = parse_code_to_ast(code)
 
-        # Should have same class
-        classes1 = list(ast1.nodes(lambda n: n.node_type == "Stmt_Class"))
-        classes2 = list(ast2.nodes(lambda n: n.node_type == "Stmt_Class"))
-        assert len(classes1) == len(classes2) == 1
+        # Same number of nodes, and the same single function/class
+        assert ast1.node_count == ast2.node_count
+        if node_type is not None:
+            assert ast1.count(node_type) == ast2.count(node_type) == 1
+
+    def test_print_project_keeps_file_order(
+        self, tmp_path, shared_parser, shared_printer
+    ):
+        """Test multi-file printing maps each file to its own code."""
+        for i in range(5):
+            (tmp_path / f"f{i}.php").write_text(f"<?php function fn{i}() {{}}")
+
+        ast = shared_parser.parse_project(str(tmp_path))
+        generated = shared_printer.print(ast)
+
+        assert len(generated) == 5
+        for path, code in generated.items():
+            stem = Path(path).stem
+            assert f"function fn{stem[1:]}()" in code
+
+    def test_print_many_without_persistent_worker(self, simple_ast):
+        """Test one-shot batch printing returns one result per payload."""
+        ast = simple_ast
+        payload = ast.to_json_bytes()
+
+        codes = Runner(persistent=False).print_many([payload, payload.decode()])
+        assert len(codes) == 2
+        assert codes[0] == codes[1]
+        assert "echo" in codes[0]
+
+    def test_print_project_with_multiple_workers(
+        self, tmp_path, shared_parser, shared_printer
+    ):
+        """Test max_workers > 1 yields the same output as a single worker."""
+        for i in range(5):
+            (tmp_path / f"f{i}.php").write_text(f"<?php function fn{i}() {{}}")
+        ast = shared_parser.parse_project(str(tmp_path))
+
+        assert PrettyPrinter(max_workers=3).print(ast) == shared_printer.print(ast)
+
+    def test_printer_max_workers_none_uses_cpu_count(self):
+        """Test max_workers=None sizes the runner pool to the CPU count."""
+        printer = PrettyPrinter(max_workers=None)
+        assert len(printer._runners) == (os.cpu_count() or 1)
+
+    def test_printer_rejects_invalid_max_workers(self):
+        """Test max_workers below 1 raises ValueError."""
+        with pytest.raises(ValueError):
+            PrettyPrinter(max_workers=0)
+
+    def test_print_retained_json_until_modified(self, tmp_path, shared_printer):
+        """Test retained parse JSON prints the same and is dropped on edits."""
+        (tmp_path / "a.php").write_text("<?php function greet() { return 1; }")
+        ast = Parser(retain_json=True).parse_project(str(tmp_path))
+        file_node = ast.file_nodes()[0]
+
+        assert not ast.is_dirty(file_node.id)
+        runner = shared_printer._runner
+        assert runner.print(ast.raw_json(file_node.id)) == runner.print(
+            ast.to_json_bytes(file_hash=file_node.id)
+        )
+
+        func = ast.first_node_of_type("Stmt_Function")
+        name = next(ast.succ(func, lambda e: e["field"] == "name"))
+        name.set_property("name", "renamed")
+
+        assert ast.is_dirty(file_node.id)
+        assert ast.raw_json(file_node.id) is None
+        assert "function renamed()" in shared_printer.print_file(ast, "a.php")
+
+    def test_print_reuses_output_until_modified(self, parse_code_to_ast):
+        """Test repeated prints of an unchanged AST reuse the printed code."""
+        ast = parse_code_to_ast("<?php function greet() { return 1; }")
+        relative_path = ast.file_paths()[0]
+        printer = PrettyPrinter(cache_output=True)
+
+        first = printer.print(ast)
+        code = printer.print_file(ast, relative_path)
+        assert printer.print(ast) == first
+        assert printer.print_file(ast, relative_path) is code
+        assert printer.print_file(ast) is code
+
+        func = ast.first_node_of_type("Stmt_Function")
+        name = next(ast.succ(func, lambda e: e["field"] == "name"))
+        name.set_property("name", "renamed")
+        renamed = printer.print_file(ast, relative_path)
+        assert "function renamed()" in renamed
+        assert "function greet()" in code
+        assert list(printer.print(ast).values()) == [renamed]
+
+    def test_print_file_reflects_property_edits(
+        self, parse_code_to_ast, shared_printer
+    ):
+        """Test untracked property writes print without a stale cache."""
+        ast = parse_code_to_ast("<?php $a = 1;")
+        assert "$a = 1;" in shared_printer.print_file(ast)
+
+        var = ast.first_node_of_type("Expr_Variable")
+        var.all_properties["name"] = "b"
+        assert "$b = 1;" in shared_printer.print_file(ast)
+        var.properties["name"] = "c"
+        assert "$c = 1;" in shared_printer.print_file(ast)
+
+        caching = PrettyPrinter(cache_output=True)
+        assert "$c = 1;" in caching.print_file(ast)
+        var.properties["name"] = "d"
+        ast.mark_modified()
+        assert "$d = 1;" in caching.print_file(ast)
+
+    def test_print_file_defaults_to_first_file(
+        self, tmp_path, shared_parser, shared_printer
+    ):
+        """Test print_file without a path prints the first file of print()."""
+        for name in ("b.php", "a.php"):
+            (tmp_path / name).write_text(f"<?php echo '{name}';")
+        ast = shared_parser.parse_project(str(tmp_path))
+
+        assert shared_printer.print_file(ast) == next(
+            iter(shared_printer.print(ast).values())
+        )
+        assert "a.php" in shared_printer.print_file(ast)
+
+    def test_printers_share_runners_per_slot(self):
+        """Test printers and parsers reuse the process-wide runner per slot."""
+        first = PrettyPrinter(max_workers=2)
+        second = PrettyPrinter()
+
+        assert second._runner is first._runner is Parser()._runner
+        assert first._runners[1] is not first._runner